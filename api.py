@@ -0,0 +1,160 @@
+import argparse
+import json
+import logging
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from features import SCHEMAS
+from metrics import profiled, render_metrics
+from microbatch import predict_churn_batched
+from model_registry import get_registry
+from prediction_cache import get_prediction_cache
+from scoring import predict_records
+from validation import validate_record, validate_records
+
+logger = logging.getLogger("retentionai.api")
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 50 * 1024 * 1024
+
+
+# JSON prediction API. POST a single customer record (object) or a list of
+# records to /predict/bank or /predict/telecom; a list is scored in one
+# vectorized scaler/model call, and single records from concurrent requests
+# are micro-batched together. Records breaking the sector's validation rules
+# are rejected with a 400 listing each one's problems.
+class PredictionHandler(BaseHTTPRequestHandler):
+    server_version = "RetentionAI"
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif path == "/ready":
+            registry = get_registry()
+            sectors = {sector: registry.is_loaded(sector) for sector in SCHEMAS}
+            self._send_json(200 if all(sectors.values()) else 503, {"ready": all(sectors.values()), "sectors": sectors})
+        elif path == "/cache/stats":
+            self._send_json(200, get_prediction_cache().stats())
+        elif path == "/metrics":
+            self._send_text(200, render_metrics(), "text/plain; version=0.0.4")
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        sector = self._sector_from_path()
+        if sector is None:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+
+        try:
+            payload = self._read_json()
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        single = isinstance(payload, dict)
+        records = [payload] if single else payload
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            self._send_json(400, {"error": "Body must be a customer record or a list of customer records"})
+            return
+
+        if single:
+            errors = validate_record(sector, payload)
+            if errors:
+                self._send_json(400, {"error": "Invalid customer record", "errors": errors})
+                return
+        else:
+            errors = validate_records(sector, records)
+            invalid = [{"index": index, "errors": text.split("; ")} for index, text in enumerate(errors) if text]
+            if invalid:
+                self._send_json(400, {"error": f"{len(invalid)} invalid customer records", "records": invalid})
+                return
+
+        try:
+            with profiled(f"api-{sector}", enabled=self._profile_requested()):
+                if single:
+                    # Single records share batches with other concurrent requests
+                    encode_start = time.perf_counter()
+                    features = SCHEMAS[sector].encode_record(payload)
+                    timings = {"encoding": time.perf_counter() - encode_start}
+                    predictions = [predict_churn_batched(sector, features, timings)]
+                else:
+                    model, scaler, version = get_registry().get_versioned(sector)
+                    predictions = predict_records(model, scaler, sector, records, version)
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            logger.exception("Prediction failed for %s", sector)
+            self._send_json(500, {"error": f"An error occurred: {str(e)}"})
+            return
+
+        if single:
+            self._send_json(200, dict(predictions[0], sector=sector))
+        else:
+            self._send_json(200, {"sector": sector, "predictions": predictions})
+
+    def _sector_from_path(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        prefix = "/predict/"
+        if path.startswith(prefix) and path[len(prefix):] in SCHEMAS:
+            return path[len(prefix):]
+        return None
+
+    # Requests with ?profile=1 are profiled when RETENTIONAI_PROFILE_DIR is set
+    def _profile_requested(self):
+        query = self.path.split("?", 1)[1] if "?" in self.path else ""
+        return "profile=1" in query.split("&")
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            raise ValueError("Request body is empty")
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Request body is too large")
+        try:
+            return json.loads(self.rfile.read(length))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+
+    def _send_json(self, status, body):
+        self._send_text(status, json.dumps(body), "application/json")
+
+    def _send_text(self, status, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve churn predictions over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    # Load and warm up every sector in the background; /ready reports when done
+    for sector in SCHEMAS:
+        get_registry().preload(sector)
+    # Hot-reload models whose artifact files change
+    get_registry().watch()
+
+    server = ThreadingHTTPServer((args.host, args.port), PredictionHandler)
+    logger.info("Serving predictions on http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
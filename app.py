@@ -1,32 +1,71 @@
+import time
+
+startup_begin = time.perf_counter()
+
 import streamlit as st
-import numpy as np
-import joblib
-from PIL import Image
-import base64
+import logging
 import os
 
-import streamlit.components.v1 as components
+from metrics import METRICS_PORT, RENDER_SECONDS, profiled, start_metrics_server
+from microbatch import predict_churn_batched
+from model_registry import get_registry
+from features import (
+    BANK_SCHEMA,
+    CARD_TYPES,
+    CONTRACTS,
+    GENDERS,
+    INTERNET_SERVICES,
+    PAYMENT_METHODS,
+    SCHEMAS,
+    TELECOM_SCHEMA,
+)
+from scoring import stream_score_csv, stream_score_parquet
+from validation import input_limits, validate_record
+
+imports_done = time.perf_counter()
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+logger = logging.getLogger("retentionai")
+
+# Load models and scalers once per process, shared by every session and rerun,
+# and hot-reload them when their artifact files change
+@st.cache_resource
+def load_model_registry():
+    registry = get_registry()
+    registry.watch()
+    return registry
+
+# Process-wide startup timings, so the breakdown is logged only once
+@st.cache_resource
+def startup_state():
+    return {"logged": False}
 
-# Load models and scalers
-bank_model = joblib.load("bank_churn_model.pkl")
-telecom_model = joblib.load("telecom_churn_model.pkl")
-bank_scaler = joblib.load("scaler_bank.pkl")
-telecom_scaler = joblib.load("scaler_telecom.pkl")
+# Serve /metrics once per process when RETENTIONAI_METRICS_PORT is set
+@st.cache_resource
+def metrics_server():
+    return start_metrics_server(METRICS_PORT) if METRICS_PORT else None
 
-# Function to predict churn
-def predict_churn(model, scaler, features):
-    scaled_features = scaler.transform([features])
-    prediction = model.predict(scaled_features)
-    return "Churned" if prediction[0] == 1 else "Not Churned"
+metrics_server()
+
+# Function to check whether this run should be profiled (?profile=1 in the
+# URL, with RETENTIONAI_PROFILE_DIR set)
+def profile_requested():
+    return st.query_params.get("profile") == "1"
+
+# Function to get a sector's model, scaler and model version, waiting for them
+# to load if needed
+def load_sector_models(sector):
+    try:
+        return load_model_registry().get_versioned(sector)
+    except FileNotFoundError as e:
+        st.error(f"Model files not found: {str(e)}")
+        st.stop()
 
 # Streamlit UI
 st.set_page_config(page_title="Churn Prediction App", page_icon="🔍", layout="wide")
 
 # Function to set video background
-def set_video_background(video_path):
-    video_file = open(video_path, 'rb')
-    video_bytes = video_file.read()
-    
+def set_video_background(video_url):
     st.markdown(
         f"""
         <style>
@@ -46,16 +85,20 @@ def set_video_background(video_path):
         }}
         </style>
         <video autoplay muted loop class="video-background">
-            <source src="data:video/mp4;base64,{base64.b64encode(video_bytes).decode()}" type="video/mp4">
+            <source src="{video_url}" type="video/mp4">
         </video>
         """,
         unsafe_allow_html=True
     )
 
-# Set video background from assets folder
-video_path = os.path.join("assets", "background.mp4")  # Update with your video filename
+# Set video background from the static folder. The browser fetches and caches
+# the file over HTTP instead of it being embedded in the page on every rerun.
+video_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "background.mp4")
 try:
-    set_video_background(video_path)
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(video_path)
+    with RENDER_SECONDS.time(step="video_background"):
+        set_video_background("app/static/background.mp4")
 except Exception as e:
     st.warning(f"Could not load background video: {e}")
     # Fallback to a color background
@@ -443,6 +486,168 @@ def reset_form():
     # Force rerun to display the default values
     st.rerun()
 
+# Worker process pool for a sector's batch scoring, started once per process
+# when RETENTIONAI_SCORING_WORKERS is above 1
+@st.cache_resource
+def scoring_pool(sector):
+    from parallel_scoring import SCORING_WORKERS, ScoringPool
+
+    return ScoringPool(sector, SCORING_WORKERS) if SCORING_WORKERS > 1 else None
+
+# Function to stream an uploaded CSV or Parquet file through the model chunk
+# by chunk into a temporary file of the same format, updating a progress bar
+# after each chunk
+def stream_uploaded_file(sector, uploaded_file, progress_bar):
+    import tempfile
+
+    model, scaler, version = load_sector_models(sector)
+    pool = scoring_pool(sector)
+    explainer = sector_explainer(sector)
+
+    def progress(rows, fraction):
+        progress_bar.progress(min(fraction or 0.0, 1.0), text=f"Scored {rows:,} customers...")
+
+    uploaded_file.seek(0)
+    parquet = uploaded_file.name.lower().endswith(".parquet")
+    if parquet:
+        output = tempfile.NamedTemporaryFile("wb", prefix=f"{sector}_scored_", suffix=".parquet", delete=False)
+    else:
+        output = tempfile.NamedTemporaryFile("w", prefix=f"{sector}_scored_", suffix=".csv", delete=False, newline="")
+    try:
+        with output:
+            if parquet:
+                summary = stream_score_parquet(
+                    model, scaler, SCHEMAS[sector], uploaded_file, output, progress=progress, pool=pool,
+                    keep_columns=None, explainer=explainer,
+                )
+            else:
+                summary = stream_score_csv(
+                    model, scaler, SCHEMAS[sector], uploaded_file, output, progress=progress, pool=pool,
+                    explainer=explainer,
+                )
+    except Exception:
+        os.remove(output.name)
+        raise
+    summary["path"] = output.name
+    summary["format"] = "parquet" if parquet else "csv"
+    summary["model_versions"] = sorted(summary.get("model_versions") or [version])
+    return summary
+
+# Function to render the batch scoring section for a sector. Each file is
+# scored once per session; the scored file is kept on disk, not in memory.
+def render_batch_scoring(sector):
+    st.markdown("<div class='form-group'><h3 class='form-group-title'>📂 Batch Scoring</h3>", unsafe_allow_html=True)
+    st.markdown(f"Required columns: `{', '.join(SCHEMAS[sector].required_columns)}`")
+
+    uploaded_file = st.file_uploader(
+        "Upload customer dataset (CSV or Parquet)", type=["csv", "parquet"], key=f"{sector}_batch_file",
+    )
+    if uploaded_file is not None:
+        result_key = f"{sector}_batch_result"
+        batch = st.session_state.get(result_key)
+        if batch is None or batch["file_id"] != uploaded_file.file_id:
+            if batch is not None and batch.get("path") and os.path.exists(batch["path"]):
+                os.remove(batch["path"])
+            progress_bar = st.progress(0.0, text="Scoring customer dataset...")
+            try:
+                with profiled(f"app-{sector}-batch", enabled=profile_requested()):
+                    batch = stream_uploaded_file(sector, uploaded_file, progress_bar)
+            except ValueError as e:
+                batch = {"error": str(e)}
+            batch["file_id"] = uploaded_file.file_id
+            st.session_state[result_key] = batch
+            progress_bar.empty()
+
+        if "error" in batch:
+            st.error(f"Could not score file: {batch['error']}")
+        else:
+            st.success(
+                f"✅ Scored {batch['rows']:,} customers, {batch['churned']:,} likely to churn "
+                f"({batch['high_risk']:,} high risk)."
+            )
+            if batch["rejected"]:
+                st.warning(
+                    f"{batch['rejected']:,} customers failed validation and were not scored; "
+                    "see the validation_errors column of the scored file."
+                )
+            st.caption(f"Model version {', '.join(batch['model_versions'])}")
+            st.dataframe(batch["top"])
+            parquet = batch["format"] == "parquet"
+            with open(batch["path"], "rb") as scored_file:
+                st.download_button(
+                    "⬇️ Download Scored Parquet" if parquet else "⬇️ Download Scored CSV",
+                    scored_file,
+                    file_name=f"{sector}_churn_predictions.{batch['format']}",
+                    mime="application/vnd.apache.parquet" if parquet else "text/csv",
+                    key=f"{sector}_batch_download",
+                )
+
+    st.markdown("</div>", unsafe_allow_html=True)
+
+# Function to show the churn probability and risk band for a prediction
+def render_risk_score(result):
+    st.markdown(f"""
+    <div style='background-color: rgba(255, 255, 255, 0.9); padding: 15px; border-radius: 10px; margin-top: 15px; border-left: 5px solid #FF9E00;'>
+        <h4 style="color: #000000;">Churn Probability: {result['churn_probability']:.1%}</h4>
+        <p style="color: #000000;">Risk Band: {result['risk_band']}</p>
+        <p style="color: #555555; font-size: 0.8rem;">Model version {result.get('model_version', 'unknown')}</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+# Function to get the path explainer for a sector's current model, or None
+# when the model isn't a tree ensemble and can't be explained
+def sector_explainer(sector):
+    from explanations import get_explainer
+
+    model, scaler, version = load_sector_models(sector)
+    try:
+        return get_explainer(model, scaler, SCHEMAS[sector], version)
+    except ValueError:
+        return None
+
+# Function to show the inputs that drove a customer's prediction: those
+# raising their churn probability when they are likely to churn, otherwise
+# those lowering it
+def render_explanation(sector, features, record, result):
+    explainer = sector_explainer(sector)
+    if explainer is None:
+        st.caption("Per-customer factors are only available for tree-based models.")
+        return
+
+    risk, retention = explainer.explain_record(features)
+    if result["prediction"] == "Churned":
+        title, factors, verb, background, border = "Risk Factors", risk, "raises", "rgba(255, 220, 220, 0.3)", "#ff5252"
+    else:
+        title, factors, verb, background, border = "Retention Strengths", retention, "lowers", "rgba(220, 255, 220, 0.3)", "#4CAF50"
+    items = "".join(
+        f"<li>{column.replace('_', ' ').capitalize()} ({record[column]}) {verb} the churn probability by "
+        f"{abs(contribution) * 100:.1f} points</li>"
+        for column, contribution in factors
+    ) or "<li>No single input stands out for this customer</li>"
+    st.markdown(f"""
+    <div style='background-color: {background}; padding: 15px; border-radius: 10px; border-left: 5px solid {border};'>
+        <h4 style="color: #000000;">{title}:</h4>
+        <ul style="color: #000000;">{items}</ul>
+    </div>
+    """, unsafe_allow_html=True)
+
+# Prediction stages timed for the latency report, in the order they run
+LATENCY_STAGES = [("encoding", "Encoding"), ("cache", "Cache"), ("queue", "Queue"), ("scaling", "Scaling"), ("inference", "Inference")]
+
+# Function to log and show how long a prediction actually took
+def report_latency(sector, timings):
+    total = sum(timings.values())
+    stages = [(key, label, timings[key]) for key, label in LATENCY_STAGES if key in timings]
+    logger.info(
+        "%s prediction latency: %s total=%.3fms",
+        sector, " ".join(f"{key}={seconds * 1000:.3f}ms" for key, _, seconds in stages), total * 1000,
+    )
+    cache_note = " (cached result)" if "cache" in timings else ""
+    st.caption(
+        "⏱️ " + " · ".join(f"{label} {seconds * 1000:.2f} ms" for _, label, seconds in stages)
+        + f" · Total {total * 1000:.2f} ms{cache_note}"
+    )
+
 # App Title
 st.markdown("<h1 class='main-title'>🔍 Customer Churn Prediction</h1>", unsafe_allow_html=True)
 
@@ -486,6 +691,13 @@ with st.sidebar:
         format_func=lambda x: f"📊 {x}"
     )
 
+    # Model status: ready once the selected sector's model is loaded and warmed up
+    sector_name = "bank" if model_type == "Bank Customer" else "telecom"
+    if load_model_registry().is_ready([sector_name]):
+        st.markdown("<p style='color: white;'>🟢 Model ready</p>", unsafe_allow_html=True)
+    else:
+        st.markdown("<p style='color: white;'>🟡 Model loading...</p>", unsafe_allow_html=True)
+
     st.markdown("<hr>", unsafe_allow_html=True)
 
     st.markdown("""
@@ -493,7 +705,7 @@ with st.sidebar:
         <h3 style='color: white; text-align: center;'>About</h3>
         <p style='color: white;'>
             This app uses machine learning models to predict customer churn in Bank and Telecom sectors.
-            Enter customer details to predict whether they are likely to churn.
+            Enter customer details, or upload a CSV of customers, to predict whether they are likely to churn.
         </p>
         <p style='color: white; text-align: center; font-style: italic; margin-top: 15px;'>
             Developed by Fathima Shabna Ilmi
@@ -503,38 +715,41 @@ with st.sidebar:
 
 # Main content
 if model_type == "Bank Customer":
+    # Load the model in the background while the form renders
+    load_model_registry().preload("bank")
+
     st.markdown("<div class='form-container'><h2 class='section-header'>🏦 Bank Customer Churn Prediction</h2>", unsafe_allow_html=True)
     
     with st.form(key="bank_form"):
         # Basic Customer Information Section
         st.markdown("<div class='form-group'><h3 class='form-group-title'>📋 Customer Profile</h3>", unsafe_allow_html=True)
         
-        gender = st.selectbox("Gender", ["Male", "Female"])
-        age = st.number_input("Age", min_value=18, max_value=100, help="Customer's age")
-        credit_score = st.number_input("Credit Score", min_value=300, max_value=900, step=1, help="Customer's credit score (300-900)")
+        gender = st.selectbox("Gender", GENDERS)
+        age = st.number_input("Age", **input_limits("bank", "age"), help="Customer's age")
+        credit_score = st.number_input("Credit Score", **input_limits("bank", "credit_score"), step=1, help="Customer's credit score (300-900)")
         
         st.markdown("</div>", unsafe_allow_html=True)
         
         # Account Information Section
         st.markdown("<div class='form-group'><h3 class='form-group-title'>💰 Account Information</h3>", unsafe_allow_html=True)
         
-        tenure = st.number_input("Tenure (Years)", min_value=0, max_value=10, help="Years as a customer")
-        balance = st.number_input("Balance", min_value=0.0, help="Current account balance")
-        estimated_salary = st.number_input("Estimated Salary", help="Customer's estimated annual salary")
+        tenure = st.number_input("Tenure (Years)", **input_limits("bank", "tenure"), help="Years as a customer")
+        balance = st.number_input("Balance", **input_limits("bank", "balance"), help="Current account balance")
+        estimated_salary = st.number_input("Estimated Salary", **input_limits("bank", "estimated_salary"), help="Customer's estimated annual salary")
         
         st.markdown("</div>", unsafe_allow_html=True)
         
         # Product Usage Section
         st.markdown("<div class='form-group'><h3 class='form-group-title'>🛒 Product Usage</h3>", unsafe_allow_html=True)
         
-        num_of_products = st.number_input("Number of Products", min_value=1, max_value=4, help="Number of bank products used")
+        num_of_products = st.number_input("Number of Products", **input_limits("bank", "num_of_products"), help="Number of bank products used")
         
         # Add a container div around the radio label for consistent styling
         st.markdown("<div class='radio-label-container'>", unsafe_allow_html=True)
         has_cr_card = st.radio("Has Credit Card?", [0, 1], format_func=lambda x: "Yes" if x == 1 else "No")
         st.markdown("</div>", unsafe_allow_html=True)
         
-        card_type = st.selectbox("Card Type", ["DIAMOND", "GOLD", "SILVER", "PLATINUM"])
+        card_type = st.selectbox("Card Type", CARD_TYPES)
         
         st.markdown("</div>", unsafe_allow_html=True)
         
@@ -546,8 +761,8 @@ if model_type == "Bank Customer":
         is_active_member = st.radio("Is Active Member?", [0, 1], format_func=lambda x: "Yes" if x == 1 else "No")
         st.markdown("</div>", unsafe_allow_html=True)
         
-        satisfaction_score = st.slider("Satisfaction Score", 1, 5, help="Customer satisfaction rating (1-5)")
-        points_earned = st.number_input("Points Earned", min_value=0, help="Reward points earned")
+        satisfaction_score = st.slider("Satisfaction Score", **input_limits("bank", "satisfaction_score"), help="Customer satisfaction rating (1-5)")
+        points_earned = st.number_input("Points Earned", **input_limits("bank", "points_earned"), help="Reward points earned")
         
         st.markdown("</div>", unsafe_allow_html=True)
         
@@ -559,51 +774,44 @@ if model_type == "Bank Customer":
             
         if submit_button:
             st.session_state.form_submitted = True
-            if (credit_score == 0 or age == 0 or estimated_salary == 0 or points_earned == 0):
-                st.error("Please fill in all the fields correctly before submitting.")
+            record = {
+                "credit_score": credit_score, "age": age, "tenure": tenure, "balance": balance,
+                "num_of_products": num_of_products, "has_cr_card": has_cr_card,
+                "is_active_member": is_active_member, "estimated_salary": estimated_salary,
+                "satisfaction_score": satisfaction_score, "points_earned": points_earned,
+                "gender": gender, "card_type": card_type,
+            }
+            errors = validate_record("bank", record)
+            if errors:
+                st.error("Please fill in all the fields correctly before submitting: " + "; ".join(errors))
             else:
                 with st.spinner("Analyzing customer data..."):
-                    # Add a slight delay for effect
-                    import time
-                    time.sleep(1)
-                    
-                    gender_encoded = [1 if gender == "Male" else 0, 1 if gender == "Female" else 0]
-                    card_type_encoded = [1 if card_type == "DIAMOND" else 0, 1 if card_type == "GOLD" else 0, 1 if card_type == "SILVER" else 0, 1 if card_type == "PLATINUM" else 0]
-                    features = np.array([credit_score, age, tenure, balance, num_of_products, has_cr_card, is_active_member, estimated_salary, satisfaction_score, points_earned] + gender_encoded + card_type_encoded)
-                    result = predict_churn(bank_model, bank_scaler, features)
+                    load_sector_models("bank")
+                    timings = {}
+                    with profiled("app-bank", enabled=profile_requested()):
+                        encode_start = time.perf_counter()
+                        features = BANK_SCHEMA.encode_record(record)
+                        timings["encoding"] = time.perf_counter() - encode_start
+                        result = predict_churn_batched("bank", features, timings)
                     
                     # Store prediction result in session state
                     st.session_state.prediction_result = result
                     
-                    if result == "Churned":
+                    if result["prediction"] == "Churned":
                         st.error(f"⚠️ Prediction: This customer is likely to churn!")
-                        st.markdown("""
-                        <div style='background-color: rgba(255, 220, 220, 0.3); padding: 15px; border-radius: 10px; border-left: 5px solid #ff5252;'>
-                            <h4 style="color: #000000;">Risk Factors:</h4>
-                            <ul style="color: #000000;">
-                                <li>Consider reviewing their account benefits</li>
-                                <li>Reach out to improve satisfaction</li>
-                                <li>Offer personalized retention incentives</li>
-                            </ul>
-                        </div>
-                        """, unsafe_allow_html=True)
                     else:
                         st.success(f"✅ Prediction: This customer is likely to remain!")
-                        st.markdown("""
-                        <div style='background-color: rgba(220, 255, 220, 0.3); padding: 15px; border-radius: 10px; border-left: 5px solid #4CAF50;'>
-                            <h4 style="color: #000000;">Retention Strengths:</h4>
-                            <ul style="color: #000000;">
-                                <li>Consider upselling additional products</li>
-                                <li>Encourage referrals from this loyal customer</li>
-                                <li>Monitor for any changes in engagement patterns</li>
-                            </ul>
-                        </div>
-                        """, unsafe_allow_html=True)
+                    render_explanation("bank", features, record, result)
+
+                    render_risk_score(result)
+                    report_latency("bank", timings)
 
     # Replace your clear button implementation with this:
     if st.session_state.get('form_submitted', False):
         if st.button("🔄 Clear Form", key="clear_form_button"):
             # Use JavaScript to reload the page
+            import streamlit.components.v1 as components
+
             components.html(
                 """
                 <script>
@@ -613,9 +821,11 @@ if model_type == "Bank Customer":
                 height=0
             )
 
+    render_batch_scoring("bank")
+
 elif model_type == "Telecom Customer":
-    # Import necessary libraries at the top of your file if not already imported
-    import numpy as np
+    # Load the model in the background while the form renders
+    load_model_registry().preload("telecom")
     
     st.markdown("<div class='form-container'><h2 class='section-header'>📞 Telecom Customer Churn Prediction</h2>", unsafe_allow_html=True)
     
@@ -623,8 +833,8 @@ elif model_type == "Telecom Customer":
         # Customer Profile Section
         st.markdown("<div class='form-group'><h3 class='form-group-title'>👤 Customer Demographics</h3>", unsafe_allow_html=True)
         
-        gender = st.selectbox("Gender", ["Male", "Female"])
-        tenure = st.number_input("Tenure (Months)", min_value=0, max_value=100, help="How long the customer has been with the company")
+        gender = st.selectbox("Gender", GENDERS)
+        tenure = st.number_input("Tenure (Months)", **input_limits("telecom", "tenure"), help="How long the customer has been with the company")
         
         st.markdown("<div class='radio-label-container'>", unsafe_allow_html=True)
         senior_citizen = st.radio("Senior Citizen", [0, 1], format_func=lambda x: "Yes" if x == 1 else "No")
@@ -637,23 +847,23 @@ elif model_type == "Telecom Customer":
         # Billing Section
         st.markdown("<div class='form-group'><h3 class='form-group-title'>💵 Billing Information</h3>", unsafe_allow_html=True)
         
-        monthly_charges = st.number_input("Monthly Charges", min_value=0.0, help="Monthly bill amount")
-        total_charges = st.number_input("Total Charges", min_value=0.0, help="Total amount charged to date")
+        monthly_charges = st.number_input("Monthly Charges", **input_limits("telecom", "monthly_charges"), help="Monthly bill amount")
+        total_charges = st.number_input("Total Charges", **input_limits("telecom", "total_charges"), help="Total amount charged to date")
         
         # Add a container div around the radio label for consistent styling
         st.markdown("<div class='radio-label-container'>", unsafe_allow_html=True)
         paperless_billing = st.radio("Paperless Billing?", [0, 1], format_func=lambda x: "Yes" if x == 1 else "No")
         st.markdown("</div>", unsafe_allow_html=True)
         
-        payment_method = st.selectbox("Payment Method", ["Electronic check", "Mailed check", "Bank transfer (automatic)", "Credit card (automatic)"])
+        payment_method = st.selectbox("Payment Method", PAYMENT_METHODS)
         
         st.markdown("</div>", unsafe_allow_html=True)
         
         # Service Section
         st.markdown("<div class='form-group'><h3 class='form-group-title'>🌐 Service Details</h3>", unsafe_allow_html=True)
         
-        contract = st.selectbox("Contract Type", ["Month-to-month", "One year", "Two year"], help="Contract length")
-        internet_service = st.selectbox("Internet Service", ["Fiber optic", "DSL", "No"], help="Type of internet service")
+        contract = st.selectbox("Contract Type", CONTRACTS, help="Contract length")
+        internet_service = st.selectbox("Internet Service", INTERNET_SERVICES, help="Type of internet service")
 
         # Add a container div around the radio label for consistent styling
         st.markdown("<div class='radio-label-container'>", unsafe_allow_html=True)
@@ -677,61 +887,43 @@ elif model_type == "Telecom Customer":
 
         if submit_button:
             st.session_state.form_submitted = True
-            if (monthly_charges == 0 or total_charges == 0 or tenure == 0):
-                st.error("Please fill in all the fields correctly before submitting.")
+            # Include senior_citizen, partner, dependent and other fields in features
+            record = {
+                "senior_citizen": senior_citizen, "partner": partner, "dependent": dependent,
+                "tenure": tenure, "phone_service": phone_service, "multiple_lines": multiple_lines,
+                "online_security": online_security, "online_backup": online_backup,
+                "device_protection": device_protection, "tech_support": tech_support,
+                "streaming_tv": streaming_tv, "streaming_movie": streaming_movie,
+                "paperless_billing": paperless_billing, "monthly_charges": monthly_charges,
+                "total_charges": total_charges, "gender": gender, "internet_service": internet_service,
+                "contract": contract, "payment_method": payment_method,
+            }
+            errors = validate_record("telecom", record)
+            if errors:
+                st.error("Please fill in all the fields correctly before submitting: " + "; ".join(errors))
             else:
                 with st.spinner("Analyzing telecom data..."):
-                    # Add a slight delay for effect
-                    import time
-                    time.sleep(1)
-                    
-                    # Include senior_citizen, partner, dependent and other fields in features
-                    contract_encoded = [1 if contract == "Month-to-month" else 0, 1 if contract == "One year" else 0, 1 if contract == "Two year" else 0]
-                    internet_service_encoded = [1 if internet_service == "Fiber optic" else 0, 1 if internet_service == "DSL" else 0, 1 if internet_service == "No" else 0]
-                    payment_method_encoded = [1 if payment_method == "Electronic check" else 0, 1 if payment_method == "Mailed check" else 0, 1 if payment_method == "Bank transfer (automatic)" else 0, 1 if payment_method == "Credit card (automatic)" else 0]
-                    gender_encoded = [1 if gender == "Male" else 0, 1 if gender == "Female" else 0]
+                    load_sector_models("telecom")
+                    timings = {}
+                    encode_start = time.perf_counter()
+                    features = TELECOM_SCHEMA.encode_record(record)
+                    timings["encoding"] = time.perf_counter() - encode_start
                     
-                    # Add all radio button values to features 
-                    features = np.array([
-                        paperless_billing, monthly_charges, total_charges, tenure, 
-                        senior_citizen, partner, dependent, phone_service, 
-                        multiple_lines, online_security, online_backup, 
-                        device_protection, tech_support, streaming_tv, streaming_movie
-                    ] + contract_encoded + internet_service_encoded + payment_method_encoded + gender_encoded)
-                    
-                    # Make sure telecom_model, telecom_scaler, and predict_churn are defined
                     try:
-                        result = predict_churn(telecom_model, telecom_scaler, features)
+                        with profiled("app-telecom", enabled=profile_requested()):
+                            result = predict_churn_batched("telecom", features, timings)
                         
                         # Store prediction result in session state
                         st.session_state.prediction_result = result
                         
-                        if result == "Churned":
+                        if result["prediction"] == "Churned":
                             st.error(f"⚠️ Prediction: This customer is likely to churn!")
-                            st.markdown("""
-                            <div style='background-color: rgba(255, 220, 220, 0.3); padding: 15px; border-radius: 10px; border-left: 5px solid #ff5252;'>
-                                <h4 style="color: #000000;">Risk Factors:</h4>
-                                <ul style="color: #000000;">
-                                    <li>Consider reviewing their account benefits</li>
-                                    <li>Reach out to improve satisfaction</li>
-                                    <li>Offer personalized retention incentives</li>
-                                </ul>
-                            </div>
-                            """, unsafe_allow_html=True)
                         else:
                             st.success(f"✅ Prediction: This customer is likely to remain!")
-                            st.markdown("""
-                            <div style='background-color: rgba(220, 255, 220, 0.3); padding: 15px; border-radius: 10px; border-left: 5px solid #4CAF50;'>
-                                <h4 style="color: #000000;">Retention Strengths:</h4>
-                                <ul style="color: #000000;">
-                                    <li>Consider upselling additional products</li>
-                                    <li>Encourage referrals from this loyal customer</li>
-                                    <li>Monitor for any changes in engagement patterns</li>
-                                </ul>
-                            </div>
-                            """, unsafe_allow_html=True)
-                    except NameError as e:
-                        st.error(f"Model error: {str(e)}. Make sure telecom_model, telecom_scaler, and predict_churn are properly defined.")
+                        render_explanation("telecom", features, record, result)
+
+                        render_risk_score(result)
+                        report_latency("telecom", timings)
                     except Exception as e:
                         st.error(f"An error occurred: {str(e)}")
     
@@ -742,6 +934,8 @@ elif model_type == "Telecom Customer":
     if st.session_state.get('form_submitted', False):
         if st.button("🔄 Clear Form", key="clear_form_button"):
             # Use JavaScript to reload the page
+            import streamlit.components.v1 as components
+
             components.html(
                 """
                 <script>
@@ -751,6 +945,8 @@ elif model_type == "Telecom Customer":
                 height=0
             )
 
+    render_batch_scoring("telecom")
+
     st.markdown("</div>", unsafe_allow_html=True)
 
 # Video controls - Optional feature
@@ -789,4 +985,13 @@ st.markdown("""
     100% { background-position: 0% 50%; }
 }
 </style>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# Log the startup time breakdown for the first run in this process
+startup = startup_state()
+if not startup["logged"]:
+    startup["logged"] = True
+    logger.info(
+        "Startup: imports %.1fms, first render %.1fms (models load in the background)",
+        (imports_done - startup_begin) * 1000, (time.perf_counter() - imports_done) * 1000,
+    )
@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+from features import SCHEMAS
+from model_registry import MODEL_DIR, SECTOR_ARTIFACTS, ModelRegistry
+from scoring import predict_proba_batch
+from validation import VALIDATION_RULES
+
+DEFAULT_SIZES = [1, 10, 100, 1000, 10000, 100000, 1000000]
+
+# Typical values for synthetic customers in columns whose validation rules
+# have no upper bound
+OPEN_RANGES = {
+    "balance": (0.0, 250000.0),
+    "estimated_salary": (1000.0, 200000.0),
+    "points_earned": (1, 1000),
+    "monthly_charges": (18.0, 120.0),
+    "total_charges": (18.0, 9000.0),
+}
+
+
+# Function to get the range a synthetic column is drawn from: the bounds of its
+# validation rule, or typical values where the rule is open-ended, so every
+# synthetic customer passes validation
+def numeric_range(sector, column):
+    rule = VALIDATION_RULES[sector][column]
+    if "allowed" in rule:
+        return min(rule["allowed"]), max(rule["allowed"])
+    if column in OPEN_RANGES:
+        return OPEN_RANGES[column]
+    return rule["min"] if "min" in rule else rule["above"] + 1, rule["max"]
+
+
+# Function to generate synthetic customers with every input column of a schema
+def synthetic_customers(schema, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for column in schema.numeric_columns:
+        low, high = numeric_range(schema.sector, column)
+        if isinstance(low, int):
+            columns[column] = rng.integers(low, high + 1, n_rows)
+        else:
+            columns[column] = rng.uniform(low, high, n_rows).round(2)
+    for column, categories in schema.categorical_columns.items():
+        columns[column] = rng.choice(categories, n_rows)
+    return pd.DataFrame(columns)
+
+
+# Function to write stand-in models, trained on synthetic customers, next to
+# the real scalers (or stand-in scalers) so the benchmark runs offline
+def write_stand_in_models(model_dir, n_estimators, seed=0):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    for sector, schema in SCHEMAS.items():
+        files = SECTOR_ARTIFACTS[sector]
+        features = schema.encode_frame(synthetic_customers(schema, 5000, seed))
+        scaler_path = os.path.join(MODEL_DIR, files["scaler"])
+        if os.path.exists(scaler_path):
+            scaler = joblib.load(scaler_path)
+        else:
+            scaler = StandardScaler().fit(pd.DataFrame(features, columns=schema.feature_names))
+        scaled = scaler.transform(features)
+        # Split on the median of two standardized raw features plus noise, so
+        # both classes are present whatever the scaler was fitted on
+        raw = features[:, :2]
+        combined = ((raw - raw.mean(axis=0)) / raw.std(axis=0)).sum(axis=1)
+        combined += np.random.default_rng(seed).normal(size=len(combined))
+        labels = (combined > np.median(combined)).astype(int)
+        assert len(np.unique(labels)) == 2, f"Stand-in {sector} labels have a single class"
+        model = RandomForestClassifier(n_estimators=n_estimators, random_state=seed).fit(scaled, labels)
+        joblib.dump(scaler, os.path.join(model_dir, files["scaler"]))
+        joblib.dump(model, os.path.join(model_dir, files["model"]))
+
+
+def _percentiles(seconds):
+    values = np.array(seconds) * 1e6
+    return {"p50_us": float(np.percentile(values, 50)), "p90_us": float(np.percentile(values, 90)),
+            "p99_us": float(np.percentile(values, 99)), "mean_us": float(values.mean())}
+
+
+# Function to time single-customer predictions stage by stage
+def bench_single_row(schema, model, scaler, records, repeats):
+    stages = {"encoding": [], "scaling": [], "inference": [], "total": []}
+    for i in range(repeats):
+        record = records[i % len(records)]
+        timings = {}
+        start = time.perf_counter()
+        features = schema.encode_record(record)
+        timings["encoding"] = time.perf_counter() - start
+        predict_proba_batch(model, scaler, features.reshape(1, -1), timings)
+        timings["total"] = time.perf_counter() - start
+        for stage, seconds in timings.items():
+            stages[stage].append(seconds)
+    return {stage: _percentiles(seconds) for stage, seconds in stages.items()}
+
+
+# Function to time one batch stage by stage and measure its peak memory
+def bench_batch(schema, model, scaler, customers):
+    timings = {}
+    start = time.perf_counter()
+    features = schema.encode_frame(customers)
+    timings["encoding"] = time.perf_counter() - start
+    predict_proba_batch(model, scaler, features, timings)
+    total = time.perf_counter() - start
+
+    tracemalloc.start()
+    predict_proba_batch(model, scaler, schema.encode_frame(customers))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "rows": len(customers),
+        "encoding_s": timings["encoding"],
+        "scaling_s": timings["scaling"],
+        "inference_s": timings["inference"],
+        "total_s": total,
+        "rows_per_s": len(customers) / total,
+        "peak_memory_mb": peak / 1024 / 1024,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args, model_dir, stand_in):
+    registry = ModelRegistry(model_dir=model_dir, backend=args.backend)
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "backend": args.backend,
+            "stand_in_models": stand_in,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "sklearn": sklearn.__version__,
+            "cpu_count": os.cpu_count(),
+        },
+        "sectors": {},
+    }
+
+    for sector in args.sector or sorted(SCHEMAS):
+        schema = SCHEMAS[sector]
+        start = time.perf_counter()
+        model, scaler = registry.get(sector)
+        load_seconds = time.perf_counter() - start
+
+        sizes = [size for size in args.sizes if size <= args.max_rows]
+        customers = synthetic_customers(schema, max(sizes + [1000]), args.seed)
+        records = customers.head(1000).to_dict("records")
+
+        print(f"{sector}: {schema.n_features} features, loaded in {load_seconds * 1000:.1f}ms")
+        single = bench_single_row(schema, model, scaler, records, args.repeats)
+        print(f"  single row  p50 {single['total']['p50_us']:.0f}us  p99 {single['total']['p99_us']:.0f}us  "
+              f"(encoding {single['encoding']['p50_us']:.0f}us, scaling {single['scaling']['p50_us']:.0f}us, "
+              f"inference {single['inference']['p50_us']:.0f}us)")
+
+        batches = []
+        for size in sizes:
+            batch = bench_batch(schema, model, scaler, customers.iloc[:size])
+            batches.append(batch)
+            print(f"  batch {size:>8}  {batch['rows_per_s']:>12,.0f} rows/s  encoding {batch['encoding_s']:.4f}s  "
+                  f"scaling {batch['scaling_s']:.4f}s  inference {batch['inference_s']:.4f}s  "
+                  f"peak {batch['peak_memory_mb']:.1f}MB")
+
+        results["sectors"][sector] = {
+            "n_features": schema.n_features,
+            "load_s": load_seconds,
+            "single_row": single,
+            "batches": batches,
+        }
+    return results
+
+
+# Function to print how each single-row p50 and batch throughput changed
+# against an earlier results file
+def compare(results, baseline):
+    print(f"\nCompared with {baseline['meta'].get('commit')} ({baseline['meta'].get('backend')}):")
+    for sector, current in results["sectors"].items():
+        previous = baseline["sectors"].get(sector)
+        if previous is None:
+            continue
+        ratio = current["single_row"]["total"]["p50_us"] / previous["single_row"]["total"]["p50_us"]
+        print(f"  {sector} single row p50: {ratio:.2f}x the baseline time")
+        previous_batches = {batch["rows"]: batch for batch in previous["batches"]}
+        for batch in current["batches"]:
+            if batch["rows"] in previous_batches:
+                ratio = batch["rows_per_s"] / previous_batches[batch["rows"]]["rows_per_s"]
+                print(f"  {sector} batch {batch['rows']:>8}: {ratio:.2f}x the baseline throughput")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the churn prediction hot path")
+    parser.add_argument("--sector", choices=sorted(SCHEMAS), action="append",
+                        help="Sector to benchmark (repeatable, default: all)")
+    parser.add_argument("--backend", choices=["sklearn", "compiled"], default="sklearn")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")], default=DEFAULT_SIZES,
+                        help="Comma-separated batch sizes")
+    parser.add_argument("--max-rows", type=int, default=max(DEFAULT_SIZES), help="Skip batch sizes above this")
+    parser.add_argument("--repeats", type=int, default=500, help="Single-row predictions timed per sector")
+    parser.add_argument("--stand-in", action="store_true",
+                        help="Use stand-in models even if the real model pickles are present")
+    parser.add_argument("--stand-in-trees", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    have_models = all(os.path.exists(os.path.join(MODEL_DIR, files["model"])) for files in SECTOR_ARTIFACTS.values())
+    if have_models and not args.stand_in:
+        results = run(args, MODEL_DIR, stand_in=False)
+    else:
+        print("Using stand-in models trained on synthetic customers")
+        with tempfile.TemporaryDirectory() as model_dir:
+            write_stand_in_models(model_dir, args.stand_in_trees, args.seed)
+            results = run(args, model_dir, stand_in=True)
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nWrote {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
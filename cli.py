@@ -0,0 +1,169 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+from features import SCHEMAS
+from model_registry import INFERENCE_BACKEND, MMAP_MODE, MODEL_DIR, ModelRegistry
+from scoring import DEFAULT_CHUNK_SIZE
+
+logger = logging.getLogger("retentionai.cli")
+
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}
+
+
+def _file_format(path):
+    file_format = FORMATS.get(os.path.splitext(path)[1].lower())
+    if file_format is None:
+        raise ValueError(f"Unsupported file type: {path} (use .csv or .parquet)")
+    return file_format
+
+
+# Function to score a CSV or Parquet file into an output file of the same
+# format, streaming it in chunks in-process or across worker processes. The
+# output is written next to output_path and renamed into place once complete,
+# so a failed run never leaves a partial file behind. With store_path, only
+# customers whose features or model changed since the last run with that
+# fingerprint store are scored; the output still has every customer. With
+# explain, each customer's top risk and retention factors are added, worked
+# out in this process. Customers failing validation are not scored and are
+# counted as rejected. Returns the stream summary with load and scoring times
+# and the model version(s) used added, and the rescored/reused counts for
+# incremental runs.
+def score_file(sector, input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, keep_columns=(),
+               model_dir=MODEL_DIR, backend=INFERENCE_BACKEND, mmap_mode=MMAP_MODE, progress=None, store_path=None,
+               id_column="customer_id", explain=False):
+    from scoring import stream_score_csv, stream_score_parquet
+
+    input_format = _file_format(input_path)
+    if _file_format(output_path) != input_format:
+        raise ValueError("Input and output must both be CSV or both be Parquet")
+
+    start = time.perf_counter()
+    registry = ModelRegistry(model_dir, backend, mmap_mode)
+    pool = explainer = None
+    # Loaded here even when workers score, so artifacts that fail validation
+    # are reported before any worker starts
+    model, scaler, version = registry.get_versioned(sector)
+    if explain:
+        from explanations import get_explainer
+
+        explainer = get_explainer(model, scaler, SCHEMAS[sector], version)
+    if workers > 1:
+        from parallel_scoring import ScoringPool
+
+        pool = ScoringPool(sector, workers, model_dir, backend, mmap_mode)
+        try:
+            pool.wait_until_loaded()
+        except BaseException:
+            pool.close()
+            raise
+    loaded = time.perf_counter()
+
+    store = None
+    if store_path:
+        from incremental import FingerprintStore
+
+        store = FingerprintStore(store_path, SCHEMAS[sector], version, id_column)
+
+    partial_path = f"{output_path}.partial"
+    try:
+        if input_format == "parquet":
+            summary = stream_score_parquet(
+                model, scaler, SCHEMAS[sector], input_path, partial_path, chunk_size, progress, pool=pool,
+                keep_columns=keep_columns, incremental=store, explainer=explainer,
+            )
+        else:
+            summary = stream_score_csv(model, scaler, SCHEMAS[sector], input_path, partial_path, chunk_size, progress,
+                                       pool=pool, incremental=store, explainer=explainer)
+        os.replace(partial_path, output_path)
+    finally:
+        if pool is not None:
+            pool.close()
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    summary["load_seconds"] = loaded - start
+    summary["score_seconds"] = time.perf_counter() - loaded
+    summary["model_versions"] = sorted(summary.get("model_versions") or [version])
+    if store is not None:
+        summary["rescored"], summary["reused"] = store.rescored, store.reused
+        # Workers that picked up a new model mid-run would leave fingerprints
+        # tagged with the wrong version, so the store is left as it was
+        if set(summary["model_versions"]) - {version}:
+            logger.warning("Model changed during the run; not updating %s", store_path)
+        else:
+            store.save()
+    return summary
+
+
+def _print_progress(rows, fraction):
+    percent = f" ({fraction:.0%})" if fraction is not None else ""
+    print(f"\rScored {rows:,} customers{percent}", end="", file=sys.stderr, flush=True)
+
+
+def _score_command(args):
+    summary = score_file(
+        args.sector, args.input, args.output, args.chunk_size, args.workers, args.keep or (),
+        args.model_dir, args.backend, args.mmap_mode, None if args.quiet else _print_progress, args.store,
+        args.id_column, args.explain,
+    )
+    if not args.quiet:
+        print(file=sys.stderr)
+
+    rows, seconds = summary["rows"], summary["score_seconds"]
+    print(
+        f"{args.sector}: scored {rows:,} customers into {args.output} "
+        f"(model version {', '.join(summary['model_versions']) or 'n/a'})\n"
+        f"  likely to churn {summary['churned']:,}, high risk {summary['high_risk']:,}\n"
+        f"  model load {summary['load_seconds']:.2f}s, scoring {seconds:.2f}s "
+        f"({rows / seconds if seconds else 0:,.0f} customers/s, {args.workers} worker(s))"
+    )
+    if summary["rejected"]:
+        print(f"  rejected {summary['rejected']:,} customers failing validation (see the validation_errors column)")
+    if args.store:
+        print(f"  rescored {summary['rescored']:,} changed customers, reused {summary['reused']:,} from {args.store}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="retentionai", description="RetentionAI command-line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    score = commands.add_parser("score", help="Score a CSV or Parquet file of customers")
+    score.add_argument("--sector", choices=sorted(SCHEMAS), required=True)
+    score.add_argument("--in", dest="input", required=True, help="Input .csv or .parquet file")
+    score.add_argument("--out", dest="output", required=True, help="Output file, in the same format as the input")
+    score.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows scored per chunk")
+    score.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                       help="Worker processes (default: one per CPU; 1 scores in-process)")
+    score.add_argument("--keep", action="append",
+                       help="Parquet only: extra input column to copy to the output (repeatable)")
+    score.add_argument("--model-dir", default=MODEL_DIR)
+    score.add_argument("--backend", choices=["sklearn", "compiled"], default=INFERENCE_BACKEND)
+    score.add_argument("--mmap-mode", choices=["r"], default=MMAP_MODE,
+                       help="Memory-map model arrays so workers share them")
+    score.add_argument("--store", help="Fingerprint store (.parquet) for incremental scoring: only customers "
+                                       "whose features or model changed since the last run are rescored")
+    score.add_argument("--id-column", default="customer_id", help="Customer ID column, for --store")
+    score.add_argument("--explain", action="store_true",
+                       help="Add each customer's top risk and retention factors to the output")
+    score.add_argument("--quiet", action="store_true", help="Don't show progress")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    if args.chunk_size <= 0 or args.workers <= 0:
+        parser.error("--chunk-size and --workers must be positive")
+    if args.keep and FORMATS.get(os.path.splitext(args.input)[1].lower()) != "parquet":
+        parser.error("--keep only applies to Parquet input; CSV output keeps every column")
+
+    try:
+        _score_command(args)
+    except (ValueError, OSError) as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.pipeline import Pipeline
+
+from compiled_forest import CompiledForest, _model_and_scaler, load_compiled, save_forest, synthetic_inputs, time_single_row
+from features import SCHEMAS
+from model_registry import MODEL_DIR, SECTOR_ARTIFACTS, load_sector_artifacts
+from scoring import CHURN_THRESHOLDS
+
+# Synthetic rows used to compare variants (and to distil surrogates) when no
+# customer data is given
+EVALUATION_ROWS = 20000
+
+# Surrogate models that can be distilled from a sector's forest
+SURROGATES = ["logistic", "gbm"]
+
+
+# Function to cut a compiled forest down to its first n_trees trees and/or to
+# max_depth levels. Splits below max_depth are dropped and their nodes become
+# leaves predicting the class mix of the customers that reached them, and
+# unreachable nodes are removed so the arrays shrink with the forest.
+def prune_forest(forest, n_trees=None, max_depth=None):
+    left, right = np.asarray(forest.left), np.asarray(forest.right)
+    depth_limit = forest.max_depth if max_depth is None else min(max_depth, forest.max_depth)
+
+    roots = np.asarray(forest.roots[:n_trees])
+    kept, splits = [roots], []
+    frontier = roots
+    for _ in range(depth_limit):
+        level_splits = frontier[left[frontier] != frontier]
+        if not len(level_splits):
+            break
+        splits.append(level_splits)
+        frontier = np.concatenate([left[level_splits], right[level_splits]])
+        kept.append(frontier)
+
+    kept = np.sort(np.concatenate(kept))
+    new_ids = np.full(len(forest.feature), -1, dtype=np.int64)
+    new_ids[kept] = np.arange(len(kept))
+    is_split = np.zeros(len(forest.feature), dtype=bool)
+    is_split[np.concatenate(splits or [np.empty(0, dtype=np.int64)])] = True
+    split = is_split[kept]
+
+    node_ids = np.arange(len(kept))
+    children = np.empty(2 * len(kept), dtype=np.int64)
+    children[0::2] = np.where(split, new_ids[right[kept]], node_ids)
+    children[1::2] = np.where(split, new_ids[left[kept]], node_ids)
+    return CompiledForest(
+        feature=np.where(split, forest.feature[kept], 0),
+        threshold=np.where(split, forest.threshold[kept], np.inf),
+        children=children,
+        value=np.asarray(forest.value[kept]),
+        roots=new_ids[roots],
+        max_depth=len(splits),
+        classes=forest.classes_,
+        n_features_in=forest.n_features_in_,
+    )
+
+
+# Function to store a compiled forest in the smallest dtypes that hold it:
+# float32 thresholds and leaf values, and int16 node indices when the forest
+# has fewer than 16384 nodes (int32 otherwise). Thresholds are rounded down
+# to the nearest float32, so float32 inputs take exactly the same branches.
+def compact_storage(forest):
+    threshold = np.asarray(forest.threshold).astype(np.float32)
+    rounded_up = threshold > forest.threshold
+    threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+
+    index_dtype = np.int16 if len(forest.children) <= np.iinfo(np.int16).max else np.int32
+    return CompiledForest(
+        feature=np.asarray(forest.feature).astype(np.int16),
+        threshold=threshold,
+        children=np.asarray(forest.children).astype(index_dtype),
+        value=np.asarray(forest.value).astype(np.float32),
+        roots=np.asarray(forest.roots).astype(index_dtype),
+        max_depth=forest.max_depth,
+        classes=forest.classes_,
+        n_features_in=forest.n_features_in_,
+    )
+
+
+# Function to distil a forest into a smaller model. The surrogate learns the
+# forest's churn probabilities rather than its labels: each input is seen
+# once as churned and once as not, weighted by the forest's probability.
+def distill(kind, inputs, probabilities, seed=0):
+    if kind == "logistic":
+        from sklearn.linear_model import LogisticRegression
+
+        surrogate = LogisticRegression(max_iter=1000)
+    elif kind == "gbm":
+        from sklearn.ensemble import HistGradientBoostingClassifier
+
+        surrogate = HistGradientBoostingClassifier(max_iter=200, max_depth=6, random_state=seed)
+    else:
+        raise ValueError(f"Unknown surrogate {kind!r} (use one of {', '.join(SURROGATES)})")
+
+    X = np.concatenate([inputs, inputs])
+    y = np.concatenate([np.ones(len(inputs), dtype=int), np.zeros(len(inputs), dtype=int)])
+    return surrogate.fit(X, y, sample_weight=np.concatenate([probabilities, 1 - probabilities]))
+
+
+# Function to get the churned-class probabilities of a model for model inputs
+def _churn_probabilities(model, inputs):
+    return model.predict_proba(inputs)[:, list(model.classes_).index(1)]
+
+
+def _labels(values):
+    if values.dtype.kind in "biuf":
+        return values.astype(int).to_numpy()
+    return values.astype(str).str.lower().isin(["1", "yes", "true", "churned"]).astype(int).to_numpy()
+
+
+# Function to load customers from a CSV or Parquet file as model inputs (and
+# churn labels when label_column is given)
+def load_customers(sector, path, scaler, label_column=None):
+    import pandas as pd
+
+    df = pd.read_parquet(path) if path.lower().endswith((".parquet", ".pq")) else pd.read_csv(path)
+    features = SCHEMAS[sector].encode_frame(df)
+    inputs = scaler.transform(features) if scaler is not None else features
+    labels = _labels(df[label_column]) if label_column else None
+    return np.asarray(inputs, dtype=np.float64), labels
+
+
+# Function to save a variant the way the registry would load it, returning the
+# path, its size in bytes and how long it takes to load
+def _save_and_time(variant, scaler, directory, name):
+    if isinstance(variant, CompiledForest):
+        path = save_forest(variant, scaler, os.path.join(directory, f"{name}.pkl"))
+        start = time.perf_counter()
+        load_compiled(path)
+    else:
+        path = os.path.join(directory, f"{name}.pkl")
+        joblib.dump(_as_pipeline(variant, scaler), path)
+        start = time.perf_counter()
+        joblib.load(path)
+    return os.path.getsize(path), time.perf_counter() - start
+
+
+def _as_pipeline(model, scaler):
+    if scaler is None:
+        return Pipeline([("model", model)])
+    return Pipeline([("scaler", scaler), ("model", model)])
+
+
+# Function to describe one variant: its size, load time, single-row and batch
+# latency, and how far its predictions are from the original model's
+def evaluate(name, variant, scaler, inputs, expected, labels, threshold, directory, repeats, size_bytes=None,
+             load_seconds=None):
+    if size_bytes is None:
+        size_bytes, load_seconds = _save_and_time(variant, scaler, directory, name)
+
+    start = time.perf_counter()
+    probabilities = _churn_probabilities(variant, inputs)
+    batch_seconds = time.perf_counter() - start
+    p50, p99 = time_single_row(variant.predict_proba, inputs[:1], repeats)
+
+    difference = np.abs(probabilities - expected)
+    report = {
+        "variant": name,
+        "size_kb": size_bytes / 1024,
+        "load_ms": load_seconds * 1000,
+        "single_row_p50_us": p50,
+        "single_row_p99_us": p99,
+        "batch_rows_per_s": len(inputs) / batch_seconds,
+        "label_agreement": float(((probabilities >= threshold) == (expected >= threshold)).mean()),
+        "mean_probability_difference": float(difference.mean()),
+        "max_probability_difference": float(difference.max()),
+    }
+    if isinstance(variant, CompiledForest):
+        report.update(trees=variant.n_trees, nodes=len(variant.feature), max_depth=variant.max_depth)
+    if labels is not None:
+        from sklearn.metrics import roc_auc_score
+
+        report["accuracy"] = float(((probabilities >= threshold) == labels).mean())
+        report["roc_auc"] = float(roc_auc_score(labels, probabilities)) if len(set(labels)) == 2 else None
+    return report
+
+
+# Function to build every compacted variant of a sector's model: the forest
+# compiled as is, then pruned to fewer and/or shallower trees in compact
+# storage, then any distilled surrogates. Returns {name: (variant, scaler)}.
+def build_variants(model, scaler, tree_counts, depths, surrogates, distil_inputs, seed=0):
+    compiled = CompiledForest.from_model(model)
+    variants = {"compiled": compiled, "compact": compact_storage(compiled)}
+    for n_trees in [None] + sorted(set(tree_counts), reverse=True):
+        for max_depth in [None] + sorted(set(depths), reverse=True):
+            if n_trees is None and max_depth is None:
+                continue
+            name = "-".join(part for part in [
+                f"trees-{n_trees}" if n_trees is not None else "",
+                f"depth-{max_depth}" if max_depth is not None else "",
+            ] if part)
+            variants[name] = compact_storage(prune_forest(compiled, n_trees, max_depth))
+
+    if surrogates:
+        teacher = _churn_probabilities(model, distil_inputs)
+        for kind in surrogates:
+            variants[kind] = distill(kind, distil_inputs, teacher, seed)
+    return variants
+
+
+# Function to compare a sector's compacted variants with its original model
+# and optionally save one as the artifact the registry serves
+def compact_sector(sector, args):
+    model, scaler, paths = load_sector_artifacts(sector, args.model_dir)
+    model, scaler = _model_and_scaler(model, scaler)
+    forest = CompiledForest.from_model(model)
+    tree_counts = args.trees if args.trees is not None else [max(forest.n_trees // 2, 1), max(forest.n_trees // 4, 1)]
+    depths = args.depths if args.depths is not None else [max(forest.max_depth // 2, 1)]
+
+    labels = None
+    if args.data:
+        inputs, labels = load_customers(sector, args.data, scaler, args.label_column)
+        order = np.random.default_rng(args.seed).permutation(len(inputs))
+        held_out = order[: len(order) // 2]
+        distil_inputs = np.concatenate([inputs[order[len(order) // 2:]], synthetic_inputs(forest, args.rows, args.seed + 1)])
+        inputs = inputs[held_out]
+        labels = labels[held_out] if labels is not None else None
+    else:
+        inputs = synthetic_inputs(forest, args.rows, args.seed)
+        distil_inputs = synthetic_inputs(forest, args.rows, args.seed + 1)
+
+    variants = build_variants(model, scaler, tree_counts, depths, args.distill or [], distil_inputs, args.seed)
+    threshold = CHURN_THRESHOLDS[sector]
+    expected = _churn_probabilities(model, inputs)
+    start = time.perf_counter()
+    load_sector_artifacts(sector, args.model_dir)
+    reports = [evaluate(
+        "original", model, scaler, inputs, expected, labels, threshold, None, args.repeats,
+        size_bytes=sum(os.path.getsize(path) for path in paths), load_seconds=time.perf_counter() - start,
+    )]
+    reports[0].update(trees=forest.n_trees, nodes=len(forest.feature), max_depth=forest.max_depth)
+    with tempfile.TemporaryDirectory() as directory:
+        for name, variant in variants.items():
+            reports.append(evaluate(name, variant, scaler, inputs, expected, labels, threshold, directory, args.repeats))
+
+    saved = None
+    if args.save:
+        if args.save not in variants:
+            raise ValueError(f"No variant named {args.save!r} for {sector} (choose from {', '.join(variants)})")
+        saved = save_variant(sector, variants[args.save], scaler, args.model_dir, paths)
+    return reports, saved
+
+
+# Function to save a variant where the registry serves it from: compiled
+# forests as the sector's compiled artifact (served with the compiled
+# backend), surrogates as its pipeline artifact
+def save_variant(sector, variant, scaler, model_dir, source_paths):
+    files = SECTOR_ARTIFACTS[sector]
+    if isinstance(variant, CompiledForest):
+        return save_forest(variant, scaler, os.path.join(model_dir, files["compiled"]))
+
+    path = os.path.join(model_dir, files["pipeline"])
+    if path in source_paths:
+        raise ValueError(f"{path} holds the model being compacted; convert it back to separate pickles first")
+    joblib.dump(_as_pipeline(variant, scaler), path)
+    return path
+
+
+def _print_reports(sector, reports):
+    has_labels = "accuracy" in reports[0]
+    print(f"\n{sector}:")
+    header = (f"  {'variant':<22}{'trees':>6}{'nodes':>9}{'depth':>6}{'size KB':>10}{'load ms':>9}"
+              f"{'p50 us':>8}{'p99 us':>8}{'rows/s':>11}{'agree':>8}{'mean |dp|':>10}")
+    print(header + (f"{'acc':>7}{'d acc':>8}{'auc':>7}" if has_labels else ""))
+    for report in reports:
+        line = (f"  {report['variant']:<22}{report.get('trees', '-'):>6}{report.get('nodes', '-'):>9}"
+                f"{report.get('max_depth', '-'):>6}{report['size_kb']:>10,.0f}{report['load_ms']:>9.1f}"
+                f"{report['single_row_p50_us']:>8.0f}{report['single_row_p99_us']:>8.0f}"
+                f"{report['batch_rows_per_s']:>11,.0f}{report['label_agreement']:>8.2%}"
+                f"{report['mean_probability_difference']:>10.4f}")
+        if has_labels:
+            auc = report["roc_auc"]
+            line += (f"{report['accuracy']:>7.2%}{report['accuracy'] - reports[0]['accuracy']:>+8.2%}"
+                     f"{auc if auc is not None else float('nan'):>7.3f}")
+        print(line)
+
+
+def _int_list(value):
+    return [int(part) for part in value.split(",") if part]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build smaller variants of each sector's forest and compare their accuracy, size and latency",
+    )
+    parser.add_argument("--sector", choices=sorted(SECTOR_ARTIFACTS), action="append",
+                        help="Sector to compact (repeatable, default: all)")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--trees", type=_int_list, help="Comma-separated tree counts to keep (default: 1/2 and 1/4)")
+    parser.add_argument("--depths", type=_int_list, help="Comma-separated depth limits (default: half the max depth)")
+    parser.add_argument("--distill", choices=SURROGATES, action="append",
+                        help="Also distil the forest into this surrogate model (repeatable)")
+    parser.add_argument("--data", help="CSV or Parquet customers to compare on instead of synthetic inputs")
+    parser.add_argument("--label-column", help="Churn label column in --data, to report accuracy and ROC AUC")
+    parser.add_argument("--rows", type=int, default=EVALUATION_ROWS, help="Synthetic rows to compare and distil on")
+    parser.add_argument("--repeats", type=int, default=200, help="Single-row predictions timed per variant")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", help="Write the comparison as JSON to this file")
+    parser.add_argument("--save", help="Variant to save as the served artifact, e.g. trees-50-depth-8")
+    args = parser.parse_args()
+    if args.label_column and not args.data:
+        parser.error("--label-column needs --data")
+
+    results = {}
+    for sector in args.sector or sorted(SECTOR_ARTIFACTS):
+        try:
+            reports, saved = compact_sector(sector, args)
+        except ValueError as e:
+            parser.exit(1, f"{sector}: {e}\n")
+        results[sector] = reports
+        _print_reports(sector, reports)
+        if saved:
+            print(f"  wrote {args.save} to {saved}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {args.report}")
+
+
+if __name__ == "__main__":
+    main()
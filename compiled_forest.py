@@ -0,0 +1,249 @@
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.tree import DecisionTreeClassifier
+
+from model_registry import MODEL_DIR, SECTOR_ARTIFACTS, load_sector_artifacts
+
+# Rows traversed together; bounds the (rows x trees) node index array
+ROW_BLOCK_SIZE = 2048
+
+# Batches of at least this many rows go to the original model when one is kept:
+# past this size scikit-learn's compiled traversal beats the NumPy one
+LARGE_BATCH_ROWS = 2048
+
+
+# A tree ensemble flattened into NumPy node arrays. Every row walks every tree
+# at once, one level per step, so predicting needs no Python loop over rows or
+# trees and none of scikit-learn's per-call overhead. Leaves point back to
+# themselves, so rows that reach a leaf early simply stay there.
+# children[2 * node] is a node's right child and children[2 * node + 1] its left.
+class CompiledForest:
+    def __init__(self, feature, threshold, children, value, roots, max_depth, classes, n_features_in, fallback=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.n_features_in_ = n_features_in
+        self.fallback = fallback
+
+    @property
+    def left(self):
+        return self.children[1::2]
+
+    @property
+    def right(self):
+        return self.children[0::2]
+
+    # Function to compile a fitted random forest, extra trees or decision tree.
+    # With keep_fallback the original model scores large batches.
+    @classmethod
+    def from_model(cls, model, keep_fallback=False):
+        if isinstance(model, DecisionTreeClassifier):
+            trees = [model]
+        elif isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+            trees = model.estimators_
+        else:
+            raise ValueError(f"Cannot compile {type(model).__name__}: only tree ensembles are supported")
+        if model.n_outputs_ != 1:
+            raise ValueError("Cannot compile multi-output models")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree in trees:
+            nodes = tree.tree_
+            node_ids = np.arange(nodes.node_count)
+            leaves = nodes.children_left == -1
+
+            features.append(np.where(leaves, 0, nodes.feature))
+            thresholds.append(np.where(leaves, np.inf, nodes.threshold))
+            lefts.append(np.where(leaves, node_ids, nodes.children_left) + offset)
+            rights.append(np.where(leaves, node_ids, nodes.children_right) + offset)
+            value = nodes.value[:, 0, :]
+            values.append(value / value.sum(axis=1, keepdims=True))
+            roots.append(offset)
+
+            offset += nodes.node_count
+            max_depth = max(max_depth, nodes.max_depth)
+
+        index_dtype = np.int32 if 2 * offset < np.iinfo(np.int32).max else np.int64
+        children = np.empty(2 * offset, dtype=index_dtype)
+        children[0::2] = np.concatenate(rights)
+        children[1::2] = np.concatenate(lefts)
+        return cls(
+            feature=np.concatenate(features).astype(index_dtype),
+            threshold=np.concatenate(thresholds),
+            children=children,
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=index_dtype),
+            max_depth=max_depth,
+            classes=model.classes_,
+            n_features_in=model.n_features_in_,
+            fallback=model if keep_fallback else None,
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def predict_proba(self, X):
+        if self.fallback is not None and len(X) >= LARGE_BATCH_ROWS:
+            return self.fallback.predict_proba(X)
+
+        X = self._check_input(X)
+        probabilities = np.empty((len(X), self.value.shape[1]))
+        for start in range(0, len(X), ROW_BLOCK_SIZE):
+            block = X[start:start + ROW_BLOCK_SIZE]
+            probabilities[start:start + len(block)] = self._predict_block(block)
+        return probabilities
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    # Function to get the leaf node each row reaches in each tree, as an
+    # (n_rows, n_trees) array of node ids
+    def apply(self, X):
+        X = self._check_input(X)
+        leaves = np.empty((len(X), self.n_trees), dtype=self.children.dtype)
+        for start in range(0, len(X), ROW_BLOCK_SIZE):
+            block = X[start:start + ROW_BLOCK_SIZE]
+            leaves[start:start + len(block)] = self._leaves_block(block)
+        return leaves
+
+    def _check_input(self, X):
+        # scikit-learn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected input of shape (n_rows, {self.n_features_in_}), got {X.shape}")
+        return X
+
+    def _predict_block(self, X):
+        return self.value[self._leaves_block(X)].mean(axis=1)
+
+    def _leaves_block(self, X):
+        values = np.ascontiguousarray(X).ravel()
+        row_offsets = (np.arange(len(X), dtype=np.int64) * X.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = values[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_left]
+        return nodes
+
+
+# Function to split a loaded artifact into its tree model and optional scaler
+def _model_and_scaler(model, scaler):
+    if isinstance(model, Pipeline):
+        if len(model.steps) == 2:
+            scaler = model.steps[0][1]
+        elif len(model.steps) > 2:
+            scaler = Pipeline(model.steps[:-1])
+        model = model.steps[-1][1]
+    return model, scaler
+
+
+# Function to draw inputs that exercise both sides of the model's splits
+def synthetic_inputs(forest, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    splits = forest.left != np.arange(len(forest.left))
+    inputs = np.zeros((n_rows, forest.n_features_in_))
+    for feature in range(forest.n_features_in_):
+        thresholds = forest.threshold[splits & (forest.feature == feature)]
+        if len(thresholds):
+            low, high = thresholds.min(), thresholds.max()
+            margin = max(high - low, 1.0) * 0.1
+            inputs[:, feature] = rng.uniform(low - margin, high + margin, n_rows)
+    return inputs
+
+
+# Function to compile a loaded (model, scaler) pair and check the compiled
+# forest gives the same probabilities as the original model
+def compile_model(model, scaler, validation_rows=1000):
+    model, scaler = _model_and_scaler(model, scaler)
+    forest = CompiledForest.from_model(model, keep_fallback=True)
+    inputs = synthetic_inputs(forest, validation_rows)
+    max_difference = float(np.abs(forest._predict_block(inputs.astype(np.float32)) - model.predict_proba(inputs)).max())
+    if max_difference > 1e-9:
+        raise ValueError(f"Compiled forest differs from the original model by up to {max_difference:.2e}")
+    return forest, scaler
+
+
+# Function to save a compiled forest's arrays and its scaler uncompressed, so
+# load_compiled can memory-map them
+def save_forest(forest, scaler, path):
+    state = {
+        "feature": forest.feature,
+        "threshold": forest.threshold,
+        "children": forest.children,
+        "value": forest.value,
+        "roots": forest.roots,
+        "max_depth": forest.max_depth,
+        "classes": forest.classes_,
+        "n_features_in": forest.n_features_in_,
+    }
+    joblib.dump({"forest": state, "scaler": scaler}, path)
+    return path
+
+
+# Function to compile a sector's artifacts and save them for the compiled backend
+def save_compiled(sector, model_dir=MODEL_DIR):
+    model, scaler, _ = load_sector_artifacts(sector, model_dir)
+    forest, scaler = compile_model(model, scaler)
+    return save_forest(forest, scaler, os.path.join(model_dir, SECTOR_ARTIFACTS[sector]["compiled"]))
+
+
+# Function to load a saved compiled forest and scaler with their arrays
+# memory-mapped read-only. Large batches have no scikit-learn fallback.
+def load_compiled(path):
+    artifact = joblib.load(path, mmap_mode="r")
+    return CompiledForest(**artifact["forest"]), artifact["scaler"]
+
+
+# Function to time single-row predictions, returning p50 and p99 in microseconds
+def time_single_row(predict_proba, row, repeats):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict_proba(row)
+        latencies.append(time.perf_counter() - start)
+    return np.percentile(latencies, 50) * 1e6, np.percentile(latencies, 99) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile each sector's forest and compare it with scikit-learn")
+    parser.add_argument("--sector", choices=sorted(SECTOR_ARTIFACTS), action="append",
+                        help="Sector to compile (repeatable, default: all)")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--rows", type=int, default=10000, help="Synthetic rows used to compare outputs")
+    parser.add_argument("--repeats", type=int, default=200, help="Single-row predictions timed per backend")
+    parser.add_argument("--save", action="store_true",
+                        help="Save memory-mappable compiled artifacts for the compiled backend")
+    args = parser.parse_args()
+
+    for sector in args.sector or sorted(SECTOR_ARTIFACTS):
+        if args.save:
+            print(f"{sector}: wrote {save_compiled(sector, args.model_dir)}")
+
+        model = joblib.load(os.path.join(args.model_dir, SECTOR_ARTIFACTS[sector]["model"]))
+        forest = CompiledForest.from_model(model)
+        inputs = synthetic_inputs(forest, args.rows)
+        max_difference = float(np.abs(forest.predict_proba(inputs) - model.predict_proba(inputs)).max())
+
+        sklearn_p50, sklearn_p99 = time_single_row(model.predict_proba, inputs[:1], args.repeats)
+        compiled_p50, compiled_p99 = time_single_row(forest.predict_proba, inputs[:1], args.repeats)
+        print(f"{sector}: {forest.n_trees} trees, {len(forest.feature)} nodes, "
+              f"max probability difference {max_difference:.2e}")
+        print(f"  single row  scikit-learn p50 {sklearn_p50:.0f}us p99 {sklearn_p99:.0f}us | "
+              f"compiled p50 {compiled_p50:.0f}us p99 {compiled_p99:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
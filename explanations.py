@@ -0,0 +1,137 @@
+import numpy as np
+
+from compiled_forest import CompiledForest, ROW_BLOCK_SIZE, _model_and_scaler
+
+# Factors listed per customer in each direction
+TOP_FACTORS = 3
+
+# Smallest contribution listed as a factor; anything smaller shows as 0.00
+MIN_CONTRIBUTION = 0.005
+
+
+# Explains a forest's churn probabilities with path-based contributions: each
+# split on a customer's path through a tree moves the probability from the
+# parent node's churn rate to the child's, and that change is credited to the
+# input column the split used. A customer's probability is the forest's base
+# rate (bias) plus the sum of their contributions. One-hot features are
+# credited to their input column, so contributions line up with
+# schema.required_columns.
+#
+# The contribution vector of every root-to-leaf path is worked out once, when
+# the explainer is built, so explaining a batch is one traversal to find each
+# row's leaves and a gather of those leaves' vectors.
+class PathExplainer:
+    def __init__(self, model, scaler, schema):
+        model, self.scaler = _model_and_scaler(model, scaler)
+        try:
+            self.forest = model if isinstance(model, CompiledForest) else CompiledForest.from_model(model)
+        except ValueError as e:
+            raise ValueError(f"Explanations need a tree ensemble model, not {type(model).__name__}") from e
+        self.schema = schema
+        self.columns = list(schema.required_columns)
+
+        column_indexes = {column: index for index, column in enumerate(self.columns)}
+        feature_columns = np.array([column_indexes[column] for _, column, _ in schema.features])
+        churn_rate = np.asarray(self.forest.value[:, list(self.forest.classes_).index(1)], dtype=np.float64)
+        self.bias = float(churn_rate[np.asarray(self.forest.roots)].mean())
+        self._leaf_rows, self._leaf_contributions = self._path_contributions(feature_columns, churn_rate)
+
+        # Factor descriptions by column and contribution in hundredths (-1.00
+        # to +1.00), so describing a batch needs no string formatting
+        self._factor_text = np.array([[f"{column} ({hundredths / 100:+.2f})" for hundredths in range(-100, 101)]
+                                      for column in self.columns], dtype=object)
+
+    # Function to work out the contributions to the end of every path, level
+    # by level from the roots. Returns the row of each leaf node in the
+    # (n_leaves, n_columns) contribution array, which is pre-divided by the
+    # number of trees so summing a row's leaves gives the forest average.
+    def _path_contributions(self, feature_columns, churn_rate):
+        forest = self.forest
+        left, right = np.asarray(forest.left), np.asarray(forest.right)
+        node_ids = np.arange(len(left))
+        is_leaf = left == node_ids
+        leaf_rows = np.full(len(left), -1, dtype=np.int64)
+        leaf_rows[is_leaf] = np.arange(is_leaf.sum())
+        leaf_contributions = np.zeros((is_leaf.sum(), len(self.columns)), dtype=np.float32)
+
+        frontier = np.asarray(forest.roots, dtype=np.int64)
+        paths = np.zeros((len(frontier), len(self.columns)))
+        while len(frontier):
+            at_leaf = is_leaf[frontier]
+            leaf_contributions[leaf_rows[frontier[at_leaf]]] = paths[at_leaf] / forest.n_trees
+
+            parents = frontier[~at_leaf]
+            parent_paths = paths[~at_leaf]
+            split_columns = feature_columns[np.asarray(forest.feature)[parents]]
+            frontier = np.concatenate([left[parents], right[parents]])
+            paths = np.concatenate([parent_paths, parent_paths])
+            paths[np.arange(len(frontier)), np.concatenate([split_columns, split_columns])] += (
+                churn_rate[frontier] - np.concatenate([churn_rate[parents], churn_rate[parents]])
+            )
+        return leaf_rows, leaf_contributions
+
+    # Function to get each customer's contribution per input column for a 2D
+    # array of encoded customers, as an (n_rows, n_columns) array
+    def contributions(self, features):
+        # The scaler rejects empty input
+        if len(features) == 0:
+            return np.empty((0, len(self.columns)))
+        inputs = self.scaler.transform(features) if self.scaler is not None else features
+        leaves = self.forest.apply(inputs)
+        contributions = np.empty((len(leaves), len(self.columns)))
+        for start in range(0, len(leaves), ROW_BLOCK_SIZE):
+            block = self._leaf_rows[leaves[start:start + ROW_BLOCK_SIZE]]
+            contributions[start:start + len(block)] = self._leaf_contributions[block].sum(axis=1)
+        return contributions
+
+    # Function to list one encoded customer's strongest factors, as lists of
+    # (column, contribution) pairs: those raising their churn probability and
+    # those lowering it, strongest first
+    def explain_record(self, features, top_n=TOP_FACTORS):
+        contributions = self.contributions(np.asarray(features).reshape(1, -1))[0]
+        order = np.argsort(-contributions, kind="stable")
+        risk = [(self.columns[i], float(contributions[i])) for i in order[:top_n]
+                if contributions[i] >= MIN_CONTRIBUTION]
+        retention = [(self.columns[i], float(contributions[i])) for i in order[::-1][:top_n]
+                     if contributions[i] <= -MIN_CONTRIBUTION]
+        return risk, retention
+
+    # Function to describe a frame's (or dict of column arrays') strongest
+    # factors per customer as two text columns: top_risk_factors raise the
+    # churn probability, e.g. "age (+0.21), balance (+0.05)", and
+    # top_retention_factors lower it, e.g. "tenure (-0.08)". Factors under
+    # MIN_CONTRIBUTION are left out.
+    def explain_frame(self, data, top_n=TOP_FACTORS):
+        contributions = self.contributions(self.schema.encode_frame(data))
+        order = np.argsort(-contributions, axis=1, kind="stable")
+        return {
+            "top_risk_factors": self._describe(contributions, order[:, :top_n], 1),
+            "top_retention_factors": self._describe(contributions, order[:, ::-1][:, :top_n], -1),
+        }
+
+    def _describe(self, contributions, indexes, sign):
+        values = np.take_along_axis(contributions, indexes, axis=1)
+        hundredths = (np.sign(values) * np.minimum(np.floor(np.abs(values) * 100 + 0.5), 100)).astype(np.int64)
+        described = np.full(len(contributions), "", dtype=object)
+        for rank in range(indexes.shape[1]):
+            shown = values[:, rank] * sign >= MIN_CONTRIBUTION
+            text = self._factor_text[indexes[shown, rank], hundredths[shown, rank] + 100]
+            described[shown] = described[shown] + (", " if rank else "") + text
+        return described
+
+
+# Latest explainer per sector, as (model version, explainer)
+_explainers = {}
+
+
+# Function to get the explainer for a sector's loaded model, building it once
+# per model version. Only the latest version's explainer is kept, so a
+# reloaded model's contribution tables don't outlive it. Raises ValueError
+# when the model isn't a tree ensemble.
+def get_explainer(model, scaler, schema, version):
+    cached = _explainers.get(schema.sector)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    explainer = PathExplainer(model, scaler, schema)
+    _explainers[schema.sector] = (version, explainer)
+    return explainer
@@ -0,0 +1,157 @@
+import numpy as np
+
+# Categorical options, in the order shown in the form
+GENDERS = ["Male", "Female"]
+CARD_TYPES = ["DIAMOND", "GOLD", "SILVER", "PLATINUM"]
+CONTRACTS = ["Month-to-month", "One year", "Two year"]
+INTERNET_SERVICES = ["Fiber optic", "DSL", "No"]
+PAYMENT_METHODS = ["Electronic check", "Mailed check", "Bank transfer (automatic)", "Credit card (automatic)"]
+
+
+# Declares a sector's model features in order. Each feature is a
+# (feature name, input column, category) tuple: category is None for numeric
+# columns, or the value a one-hot feature is set for.
+class FeatureSchema:
+    def __init__(self, sector, features):
+        self.sector = sector
+        self.features = features
+        self.feature_names = [name for name, _, _ in features]
+        self.n_features = len(features)
+
+        self.numeric_columns = []
+        self._numeric_indexes = []
+        self.categorical_columns = {}
+        self._category_indexes = {}
+        for index, (_, column, category) in enumerate(features):
+            if category is None:
+                self.numeric_columns.append(column)
+                self._numeric_indexes.append(index)
+            else:
+                self.categorical_columns.setdefault(column, []).append(category)
+                self._category_indexes.setdefault(column, {})[category] = index
+
+        self.required_columns = self.numeric_columns + list(self.categorical_columns)
+        self._category_lookups = None
+
+    # Function to check the schema matches the features a scaler (or pipeline)
+    # was fitted on
+    def validate(self, estimator):
+        fitted = getattr(estimator, "feature_names_in_", None)
+        if fitted is None:
+            if getattr(estimator, "n_features_in_", self.n_features) != self.n_features:
+                raise ValueError(
+                    f"{self.sector} {type(estimator).__name__} expects {estimator.n_features_in_} features, "
+                    f"schema has {self.n_features}"
+                )
+            return
+        if list(fitted) != self.feature_names:
+            raise ValueError(
+                f"{self.sector} {type(estimator).__name__} features {list(fitted)} do not match "
+                f"schema features {self.feature_names}"
+            )
+
+    # Function to check that a frame (or dict of columns) has every input column
+    def check_columns(self, data):
+        missing = [column for column in self.required_columns if column not in data]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    # Function to encode one customer (dict) into a 1D feature array
+    def encode_record(self, record):
+        self.check_columns(record)
+        encoded = np.zeros(self.n_features)
+        for index, column in zip(self._numeric_indexes, self.numeric_columns):
+            encoded[index] = float(record[column])
+        for column, indexes in self._category_indexes.items():
+            index = indexes.get(record[column])
+            if index is not None:
+                encoded[index] = 1.0
+        return encoded
+
+    # Function to encode a DataFrame (or dict of column arrays) into a 2D
+    # feature array. Unknown category values leave their one-hot features at 0.
+    def encode_frame(self, data):
+        self.check_columns(data)
+        if self._category_lookups is None:
+            self._category_lookups = self._build_category_lookups()
+        n_rows = len(data[self.required_columns[0]])
+        encoded = np.zeros((n_rows, self.n_features))
+        for index, column in zip(self._numeric_indexes, self.numeric_columns):
+            encoded[:, index] = np.asarray(data[column], dtype=float)
+        for column, (categories, indexes) in self._category_lookups.items():
+            codes = categories.get_indexer(np.asarray(data[column]))
+            rows = np.flatnonzero(codes >= 0)
+            encoded[rows, indexes[codes[rows]]] = 1.0
+        return encoded
+
+    # Function to encode a list of customer records (dicts) into a 2D feature array
+    def encode_records(self, records):
+        import pandas as pd
+
+        return self.encode_frame(pd.DataFrame.from_records(records))
+
+    # Vectorized lookups from category value to feature index, per column. Built
+    # on first use so the form path never has to import pandas.
+    def _build_category_lookups(self):
+        import pandas as pd
+
+        return {
+            column: (pd.Index(list(indexes)), np.array(list(indexes.values())))
+            for column, indexes in self._category_indexes.items()
+        }
+
+
+BANK_SCHEMA = FeatureSchema("bank", [
+    ("CreditScore", "credit_score", None),
+    ("Age", "age", None),
+    ("Tenure", "tenure", None),
+    ("Balance", "balance", None),
+    ("NumOfProducts", "num_of_products", None),
+    ("HasCrCard", "has_cr_card", None),
+    ("IsActiveMember", "is_active_member", None),
+    ("EstimatedSalary", "estimated_salary", None),
+    ("Satisfaction Score", "satisfaction_score", None),
+    ("Point Earned", "points_earned", None),
+    ("Gender_Female", "gender", "Female"),
+    ("Gender_Male", "gender", "Male"),
+    ("Card Type_DIAMOND", "card_type", "DIAMOND"),
+    ("Card Type_GOLD", "card_type", "GOLD"),
+    ("Card Type_PLATINUM", "card_type", "PLATINUM"),
+    ("Card Type_SILVER", "card_type", "SILVER"),
+])
+
+TELECOM_SCHEMA = FeatureSchema("telecom", [
+    ("SeniorCitizen", "senior_citizen", None),
+    ("Partner", "partner", None),
+    ("Dependents", "dependent", None),
+    ("tenure", "tenure", None),
+    ("PhoneService", "phone_service", None),
+    ("MultipleLines", "multiple_lines", None),
+    ("OnlineSecurity", "online_security", None),
+    ("OnlineBackup", "online_backup", None),
+    ("DeviceProtection", "device_protection", None),
+    ("TechSupport", "tech_support", None),
+    ("StreamingTV", "streaming_tv", None),
+    ("StreamingMovies", "streaming_movie", None),
+    ("PaperlessBilling", "paperless_billing", None),
+    ("MonthlyCharges", "monthly_charges", None),
+    ("TotalCharges", "total_charges", None),
+    ("gender_Female", "gender", "Female"),
+    ("gender_Male", "gender", "Male"),
+    ("InternetService_DSL", "internet_service", "DSL"),
+    ("InternetService_Fiber optic", "internet_service", "Fiber optic"),
+    ("InternetService_No", "internet_service", "No"),
+    ("Contract_Month-to-month", "contract", "Month-to-month"),
+    ("Contract_One year", "contract", "One year"),
+    ("Contract_Two year", "contract", "Two year"),
+    ("PaymentMethod_Bank transfer (automatic)", "payment_method", "Bank transfer (automatic)"),
+    ("PaymentMethod_Credit card (automatic)", "payment_method", "Credit card (automatic)"),
+    ("PaymentMethod_Electronic check", "payment_method", "Electronic check"),
+    ("PaymentMethod_Mailed check", "payment_method", "Mailed check"),
+])
+
+# Feature schema for each sector
+SCHEMAS = {
+    "bank": BANK_SCHEMA,
+    "telecom": TELECOM_SCHEMA,
+}
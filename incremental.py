@@ -0,0 +1,113 @@
+import logging
+import os
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger("retentionai.incremental")
+
+# Columns of a fingerprint store file
+STORE_COLUMNS = ["customer_id", "fingerprint", "model_version", "churn_probability"]
+
+
+# Function to hash each row of an encoded feature array to a 64-bit fingerprint
+def fingerprints(features):
+    import pandas as pd
+
+    return pd.util.hash_pandas_object(pd.DataFrame(features), index=False).to_numpy()
+
+
+# Function to take the rows selected by a boolean mask from a frame or dict of
+# column arrays
+def take_rows(chunk, mask):
+    if isinstance(chunk, dict):
+        return {column: np.asarray(values)[mask] for column, values in chunk.items()}
+    return chunk[mask]
+
+
+# The previous run's churn probability for each customer, with a fingerprint
+# of the encoded features it was computed from and the model version that
+# computed it. Scoring through the store only sends customers that are new,
+# whose features changed or whose model changed to the model; everyone else
+# gets their previous probability back. The store is kept as a Parquet file
+# and replaced by this run's customers on save().
+class FingerprintStore:
+    def __init__(self, path, schema, model_version, id_column="customer_id"):
+        import pandas as pd
+
+        self.path = path
+        self.schema = schema
+        self.model_version = model_version
+        self.id_column = id_column
+        self.rescored = 0
+        self.reused = 0
+        self._seen = []
+
+        if os.path.exists(path):
+            previous = pd.read_parquet(path, columns=STORE_COLUMNS)
+        else:
+            previous = pd.DataFrame({column: [] for column in STORE_COLUMNS})
+        self._ids = pd.Index(previous["customer_id"])
+        self._fingerprints = previous["fingerprint"].to_numpy(dtype=np.uint64)
+        self._versions = previous["model_version"].to_numpy(dtype=object)
+        self._probabilities = previous["churn_probability"].to_numpy(dtype=float)
+
+    def __len__(self):
+        return len(self._ids)
+
+    # Function to score an iterable of frames (or dicts of column arrays) with
+    # score, a function that takes an iterable of chunks and yields
+    # (chunk, probabilities) pairs in order, like ScoringPool.score_chunks.
+    # Only the changed rows of each chunk are passed on to it. Yields each
+    # whole chunk with every row's probability, in input order.
+    def score_chunks(self, chunks, score):
+        pending = deque()
+
+        def changed_rows(chunks):
+            for chunk in chunks:
+                if self.id_column not in chunk:
+                    raise ValueError(f"Missing customer ID column: {self.id_column}")
+                ids = np.asarray(chunk[self.id_column])
+                chunk_fingerprints = fingerprints(self.schema.encode_frame(chunk))
+                positions = self._ids.get_indexer(ids)
+                found = positions >= 0
+                unchanged = found.copy()
+                unchanged[found] = (
+                    (self._fingerprints[positions[found]] == chunk_fingerprints[found])
+                    & (self._versions[positions[found]] == self.model_version)
+                )
+                probabilities = np.full(len(ids), np.nan)
+                probabilities[unchanged] = self._probabilities[positions[unchanged]]
+                pending.append((chunk, ids, chunk_fingerprints, probabilities, ~unchanged))
+                yield take_rows(chunk, ~unchanged)
+
+        for _, changed_probabilities in score(changed_rows(chunks)):
+            chunk, ids, chunk_fingerprints, probabilities, changed = pending.popleft()
+            probabilities[changed] = changed_probabilities
+            self.rescored += int(changed.sum())
+            self.reused += int(len(changed) - changed.sum())
+            self._seen.append((ids, chunk_fingerprints, probabilities))
+            yield chunk, probabilities
+
+    # Function to replace the store file with the customers scored this run.
+    # Customers missing from this run are dropped; for repeated IDs the last
+    # row wins.
+    def save(self):
+        import pandas as pd
+
+        if self._seen:
+            ids, chunk_fingerprints, probabilities = (np.concatenate(parts) for parts in zip(*self._seen))
+        else:
+            ids, chunk_fingerprints, probabilities = np.empty(0, dtype=object), np.empty(0, dtype=np.uint64), np.empty(0)
+        store = pd.DataFrame({
+            "customer_id": ids,
+            "fingerprint": chunk_fingerprints,
+            "model_version": self.model_version,
+            "churn_probability": probabilities,
+        }).drop_duplicates("customer_id", keep="last")
+
+        partial_path = f"{self.path}.partial"
+        store.to_parquet(partial_path, index=False)
+        os.replace(partial_path, self.path)
+        logger.info("Saved fingerprints for %d customers to %s", len(store), self.path)
+        return len(store)
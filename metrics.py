@@ -0,0 +1,203 @@
+import bisect
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("retentionai.metrics")
+
+# Upper bounds of the latency histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Directory profiles are written to. Profiling is off unless this is set, so
+# a request can't turn it on for a deployment that hasn't opted in.
+PROFILE_DIR = os.environ.get("RETENTIONAI_PROFILE_DIR") or None
+
+# Port the Streamlit app serves /metrics on (0 disables it); the API serves
+# /metrics on its own port
+METRICS_PORT = int(os.environ.get("RETENTIONAI_METRICS_PORT", "0"))
+
+_metrics = []
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+# A monotonically increasing count, one series per combination of labels
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels.get(name, "")) for name in self.label_names), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+# Counts observations into cumulative latency buckets, one series per
+# combination of labels
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, seconds, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    # Function to time a block of code, labelling the observation with
+    # outcome "ok", or "error" if the block raised
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            self.observe(time.perf_counter() - start, outcome=outcome, **labels)
+
+    def count(self, **labels):
+        series = self._series.get(tuple(str(labels.get(name, "")) for name in self.label_names))
+        return series[2] if series else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.label_names, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.label_names, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+
+# Forked worker processes get fresh locks, in case another thread held one
+# at the time of the fork
+def _reset_locks():
+    for metric in _metrics:
+        metric._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_locks)
+
+
+MODEL_LOAD_SECONDS = Histogram(
+    "retentionai_model_load_seconds", "Time to load and warm up a sector's model", ["sector", "outcome"],
+)
+STAGE_SECONDS = Histogram(
+    "retentionai_prediction_stage_seconds", "Time spent in each prediction stage", ["sector", "stage"],
+)
+PREDICTION_SECONDS = Histogram(
+    "retentionai_prediction_seconds", "End-to-end prediction time per call", ["sector", "source", "outcome"],
+)
+PREDICTIONS_TOTAL = Counter(
+    "retentionai_predictions_total", "Customers scored", ["sector", "source", "outcome"],
+)
+RENDER_SECONDS = Histogram(
+    "retentionai_render_seconds", "Time spent in app rendering steps", ["step", "outcome"],
+)
+
+
+# Function to record a prediction's stage timings (seconds by stage name)
+def record_stages(sector, timings):
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.observe(seconds, sector=sector, stage=stage)
+
+
+# Function to render every metric in the Prometheus text format
+def render_metrics():
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Function to profile a block of code with cProfile when enabled and profiling
+# is configured. The profile is saved to PROFILE_DIR as <name>-<time>.prof and
+# its slowest functions are logged.
+@contextmanager
+def profiled(name, enabled=True):
+    if not enabled or PROFILE_DIR is None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{time.perf_counter_ns()}.prof")
+        profiler.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(15)
+        logger.info("Profile for %s saved to %s\n%s", name, path, summary.getvalue())
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0].rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        data = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Function to serve /metrics from a background thread, for processes (like
+# the Streamlit app) that have no HTTP server of their own
+def start_metrics_server(port, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info("Serving metrics on http://%s:%d/metrics", host, port)
+    return server
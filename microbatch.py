@@ -0,0 +1,141 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from metrics import PREDICTION_SECONDS, PREDICTIONS_TOTAL, record_stages
+from model_registry import get_registry
+from prediction_cache import get_prediction_cache
+from scoring import CHURN_THRESHOLDS, churn_result, predict_proba_batch
+
+# Most rows scored together, and longest a request waits for others to join it
+DEFAULT_MAX_BATCH_SIZE = int(os.environ.get("RETENTIONAI_BATCH_MAX_SIZE", "256"))
+DEFAULT_MAX_WAIT_MS = float(os.environ.get("RETENTIONAI_BATCH_MAX_WAIT_MS", "2"))
+
+_STOP = object()
+
+
+# Collects single-row predictions from concurrent callers and runs them as one
+# batched call. A batch is sent when it reaches max_batch_size rows or when the
+# oldest request has waited max_wait_ms, whichever comes first.
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS, name="microbatch"):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    # Function to queue one encoded row; the future resolves to its output
+    def submit(self, features):
+        future = Future()
+        self._queue.put((np.asarray(features, dtype=float), future, time.perf_counter()))
+        return future
+
+    # Function to predict one encoded row, blocking until its batch has run.
+    # Pass a dict as timings to get queue wait, scaling and inference time.
+    def predict(self, features, timings=None, timeout=None):
+        prediction, batch_timings = self.submit(features).result(timeout)
+        if timings is not None:
+            timings.update(batch_timings)
+        return prediction
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            stopping = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._process(batch)
+            if stopping:
+                return
+
+    def _process(self, batch):
+        started = time.perf_counter()
+        try:
+            timings = {}
+            predictions = self.predict_fn(np.vstack([features for features, _, _ in batch]), timings)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future, queued_at), prediction in zip(batch, predictions):
+            future.set_result((prediction, dict(timings, queue=started - queued_at)))
+
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+# Function to get the shared batcher for a sector
+def get_batcher(sector):
+    batcher = _batchers.get(sector)
+    if batcher is None:
+        with _batchers_lock:
+            batcher = _batchers.get(sector)
+            if batcher is None:
+                batcher = MicroBatcher(_sector_predict_fn(sector), name=f"microbatch-{sector}")
+                _batchers[sector] = batcher
+    return batcher
+
+
+# Each batch takes one snapshot of the sector's model, so every row in it is
+# scored by, and reports, the same model version
+def _sector_predict_fn(sector):
+    def predict(features, timings):
+        model, scaler, version = get_registry().get_versioned(sector)
+        return [(probability, version) for probability in predict_proba_batch(model, scaler, features, timings)]
+    return predict
+
+
+# Function to predict churn for one encoded customer, answering repeats from
+# the prediction cache and sending the rest through the sector's batcher.
+# Stage timings already in timings (such as encoding) are recorded with the rest.
+def predict_churn_batched(sector, features, timings=None):
+    if timings is None:
+        timings = {}
+    lookup_start = time.perf_counter()
+    source = "single"
+    try:
+        cache = get_prediction_cache()
+        key = cache.key(sector, get_registry().version(sector), features)
+        result = cache.get(key)
+        if result is not None:
+            source = "cache"
+            timings["cache"] = time.perf_counter() - lookup_start
+        else:
+            probability, version = get_batcher(sector).predict(features, timings)
+            result = churn_result(probability, CHURN_THRESHOLDS[sector], version)
+            cache.put(cache.key(sector, version, features), result)
+    except Exception:
+        PREDICTION_SECONDS.observe(time.perf_counter() - lookup_start, sector=sector, source=source, outcome="error")
+        PREDICTIONS_TOTAL.inc(sector=sector, source=source, outcome="error")
+        raise
+
+    PREDICTION_SECONDS.observe(time.perf_counter() - lookup_start, sector=sector, source=source, outcome="ok")
+    PREDICTIONS_TOTAL.inc(sector=sector, source=source, outcome="ok")
+    record_stages(sector, timings)
+    return dict(result)
@@ -0,0 +1,293 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import joblib
+import numpy as np
+
+from features import SCHEMAS
+from metrics import MODEL_LOAD_SECONDS
+from scoring import predict_proba_batch
+
+logger = logging.getLogger("retentionai.models")
+
+# Directory holding the model and scaler pickles (defaults to the app folder)
+MODEL_DIR = os.environ.get("RETENTIONAI_MODEL_DIR", os.path.dirname(os.path.abspath(__file__)))
+
+# Inference backend: "sklearn" runs the pickled model as is, "compiled" runs
+# tree ensembles through compiled_forest.CompiledForest
+INFERENCE_BACKEND = os.environ.get("RETENTIONAI_INFERENCE_BACKEND", "sklearn")
+
+# Synthetic rows run through each newly loaded model before it serves requests
+WARMUP_ROWS = int(os.environ.get("RETENTIONAI_WARMUP_ROWS", "256"))
+
+# Set to "r" to memory-map the NumPy arrays in uncompressed joblib pickles, so
+# worker processes on one host share them through the page cache
+MMAP_MODE = os.environ.get("RETENTIONAI_MMAP_MODE") or None
+
+# Seconds between checks of the artifact files for a new model (0 disables)
+RELOAD_INTERVAL = float(os.environ.get("RETENTIONAI_RELOAD_INTERVAL_SECONDS", "10"))
+
+# Artifact files for each sector. A combined pipeline (see pipeline_artifacts.py)
+# is used when present, otherwise the separate model and scaler pickles. With
+# the compiled backend, a saved compiled forest (see compiled_forest.py) is
+# always memory-mapped.
+SECTOR_ARTIFACTS = {
+    "bank": {
+        "model": "bank_churn_model.pkl",
+        "scaler": "scaler_bank.pkl",
+        "pipeline": "bank_churn_pipeline.pkl",
+        "compiled": "bank_churn_compiled.pkl",
+    },
+    "telecom": {
+        "model": "telecom_churn_model.pkl",
+        "scaler": "scaler_telecom.pkl",
+        "pipeline": "telecom_churn_pipeline.pkl",
+        "compiled": "telecom_churn_compiled.pkl",
+    },
+}
+
+
+# Loads each sector's model and scaler on first use and keeps them for the
+# lifetime of the process, so every session and rerun shares one copy. A model
+# is validated and warmed up with a synthetic batch before get() hands it out,
+# so a loaded sector is also a ready one.
+#
+# Each sector's model, scaler and version are stored as one tuple and replaced
+# in a single assignment, so a reload never mixes old and new artifacts and
+# predictions that already hold the old tuple finish on the old model.
+class ModelRegistry:
+    def __init__(self, model_dir=MODEL_DIR, backend=INFERENCE_BACKEND, mmap_mode=MMAP_MODE):
+        if backend not in ("sklearn", "compiled"):
+            raise ValueError(f"Unknown inference backend: {backend}")
+        self.model_dir = model_dir
+        self.backend = backend
+        self.mmap_mode = mmap_mode
+        self._loaded = {}
+        self._failed_versions = {}
+        self._locks = {sector: threading.Lock() for sector in SECTOR_ARTIFACTS}
+        self._reload_listeners = []
+        self._preloading = set()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    # Function to get the (model, scaler) pair for a sector, loading it if
+    # needed. The scaler is None when the model is a pipeline that scales itself.
+    def get(self, sector):
+        model, scaler, _ = self.get_versioned(sector)
+        return model, scaler
+
+    # Function to get (model, scaler, version) for a sector, all from the same
+    # load. The version is a short hash of the artifact files' names, sizes
+    # and modification times.
+    def get_versioned(self, sector):
+        if sector not in SECTOR_ARTIFACTS:
+            raise KeyError(f"Unknown sector: {sector}")
+
+        loaded = self._loaded.get(sector)
+        if loaded is None:
+            with self._locks[sector]:
+                loaded = self._loaded.get(sector)
+                if loaded is None:
+                    loaded = self._load(sector)
+                    self._loaded[sector] = loaded
+        return loaded
+
+    def version(self, sector):
+        return self.get_versioned(sector)[2]
+
+    # Function to get the version of a sector's artifact files as they are on
+    # disk now, without loading them
+    def artifact_version(self, sector):
+        return _artifact_version(self._artifact_paths(sector))
+
+    def is_loaded(self, sector):
+        return sector in self._loaded
+
+    # Function to check that every given sector (default: all) is loaded and
+    # warmed up
+    def is_ready(self, sectors=None):
+        return all(self.is_loaded(sector) for sector in (sectors or SECTOR_ARTIFACTS))
+
+    # Function to start loading a sector in a background thread. Callers of
+    # get() wait for that load instead of starting another one.
+    def preload(self, sector):
+        if self.is_loaded(sector) or sector in self._preloading:
+            return
+        self._preloading.add(sector)
+        threading.Thread(target=self._preload, args=(sector,), name=f"preload-{sector}", daemon=True).start()
+
+    def _preload(self, sector):
+        try:
+            self.get(sector)
+        except Exception:
+            logger.exception("Background load failed for %s", sector)
+        finally:
+            self._preloading.discard(sector)
+
+    # Function to load a sector's artifacts again from disk and swap them in.
+    # Predictions keep using the current model until the new one is loaded,
+    # validated and warmed up; if that fails the current model stays.
+    def reload(self, sector):
+        with self._locks[sector]:
+            loaded = self._load(sector)
+            self._loaded[sector] = loaded
+        for listener in self._reload_listeners:
+            listener(sector)
+        return loaded[2]
+
+    # Function to register a callback run with the sector name after a reload
+    def add_reload_listener(self, listener):
+        self._reload_listeners.append(listener)
+
+    # Function to reload a loaded sector if its artifact files have changed.
+    # Artifacts that fail to load are logged and not retried until they
+    # change again. Returns True if a new version was swapped in.
+    def check_for_update(self, sector):
+        loaded = self._loaded.get(sector)
+        if loaded is None:
+            return False
+        try:
+            version = self.artifact_version(sector)
+        except OSError:
+            # Files missing or being replaced; look again next time
+            return False
+        if version == loaded[2] or version == self._failed_versions.get(sector):
+            return False
+
+        try:
+            new_version = self.reload(sector)
+        except Exception:
+            logger.exception("Keeping %s model version %s: artifacts version %s failed to load", sector, loaded[2], version)
+            self._failed_versions[sector] = version
+            return False
+        logger.info("Swapped in %s model version %s (was %s)", sector, new_version, loaded[2])
+        return True
+
+    # Function to check the artifact files every interval seconds in a
+    # background thread, hot-reloading any loaded sector whose files changed
+    def watch(self, interval=RELOAD_INTERVAL):
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval):
+        while not self._stop_watching.wait(interval):
+            for sector in list(self._loaded):
+                self.check_for_update(sector)
+
+    def _load(self, sector):
+        start = time.perf_counter()
+        with MODEL_LOAD_SECONDS.time(sector=sector):
+            (model, scaler), version = self._build(sector)
+            loaded = time.perf_counter()
+            check_probabilities(sector, warm_up(sector, model, scaler))
+        logger.info(
+            "Loaded %s model version %s in %.1fms, validated and warmed up in %.1fms",
+            sector, version, (loaded - start) * 1000, (time.perf_counter() - loaded) * 1000,
+        )
+        return model, scaler, version
+
+    # Function to list the artifact files a sector would load from right now
+    def _artifact_paths(self, sector):
+        files = SECTOR_ARTIFACTS[sector]
+        for kind in (["compiled"] if self.backend == "compiled" else []) + ["pipeline"]:
+            path = os.path.join(self.model_dir, files[kind])
+            if os.path.exists(path):
+                return [path]
+        return [os.path.join(self.model_dir, files["model"]), os.path.join(self.model_dir, files["scaler"])]
+
+    def _build(self, sector):
+        # Versioned from the files as they are before loading, so a file
+        # replaced mid-load shows up as a new version on the next check
+        paths = self._artifact_paths(sector)
+        version = _artifact_version(paths)
+
+        if self.backend == "compiled" and paths[0].endswith(SECTOR_ARTIFACTS[sector]["compiled"]):
+            from compiled_forest import load_compiled
+
+            forest, scaler = load_compiled(paths[0])
+            SCHEMAS[sector].validate(forest)
+            if scaler is not None:
+                SCHEMAS[sector].validate(scaler)
+            return (forest, scaler), version
+
+        model, scaler, _ = load_sector_artifacts(sector, self.model_dir, self.mmap_mode)
+        if self.backend == "compiled":
+            from compiled_forest import compile_model
+
+            try:
+                model, scaler = compile_model(model, scaler)
+            except ValueError as e:
+                logger.warning("Using the scikit-learn model for %s: %s", sector, e)
+        return (model, scaler), version
+
+
+# Function to run synthetic customers through a model once, single-row and
+# batched, so the first real request doesn't pay one-off initialization costs.
+# Always scores at least one row and returns the batch's probabilities.
+def warm_up(sector, model, scaler, n_rows=WARMUP_ROWS):
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(max(n_rows, 1), SCHEMAS[sector].n_features))
+    if scaler is not None and getattr(scaler, "mean_", None) is not None:
+        features = features * scaler.scale_ + scaler.mean_
+    predict_proba_batch(model, scaler, features[:1])
+    return predict_proba_batch(model, scaler, features)
+
+
+# Function to check a model's smoke-test output is one valid probability per row
+def check_probabilities(sector, probabilities):
+    probabilities = np.asarray(probabilities)
+    if probabilities.ndim != 1 or not np.all((probabilities >= 0) & (probabilities <= 1)):
+        raise ValueError(f"{sector} model returned invalid churn probabilities in its smoke test")
+
+
+# Function to load a sector's pipeline, or its model and scaler, from disk.
+# Returns (model, scaler, paths); scaler is None for a pipeline.
+def load_sector_artifacts(sector, model_dir=MODEL_DIR, mmap_mode=None):
+    files = SECTOR_ARTIFACTS[sector]
+    pipeline_path = os.path.join(model_dir, files["pipeline"])
+    if os.path.exists(pipeline_path):
+        pipeline = joblib.load(pipeline_path, mmap_mode=mmap_mode)
+        SCHEMAS[sector].validate(pipeline)
+        return pipeline, None, [pipeline_path]
+
+    model_path = os.path.join(model_dir, files["model"])
+    scaler_path = os.path.join(model_dir, files["scaler"])
+    model = joblib.load(model_path, mmap_mode=mmap_mode)
+    scaler = joblib.load(scaler_path, mmap_mode=mmap_mode)
+    SCHEMAS[sector].validate(scaler)
+    SCHEMAS[sector].validate(model)
+    return model, scaler, [model_path, scaler_path]
+
+
+def _artifact_version(paths):
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+# Function to get the process-wide registry shared by the app, API and scripts
+def get_registry():
+    global _default_registry
+    if _default_registry is None:
+        with _default_registry_lock:
+            if _default_registry is None:
+                _default_registry = ModelRegistry()
+    return _default_registry
@@ -0,0 +1,126 @@
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from features import SCHEMAS
+from metrics import PREDICTION_SECONDS, PREDICTIONS_TOTAL
+from model_registry import INFERENCE_BACKEND, MMAP_MODE, MODEL_DIR
+from scoring import predict_proba_batch
+
+# Worker processes used for batch scoring in the app (1 scores in-process)
+SCORING_WORKERS = int(os.environ.get("RETENTIONAI_SCORING_WORKERS", "1"))
+
+# Chunks queued per worker; bounds how much input is held in memory at once
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+# How workers are started. Streamlit runs the app script as __main__, which
+# spawned workers would re-run, so Linux forks them; each worker still loads
+# its own registry rather than inheriting locks from the parent's threads.
+START_METHOD = "fork" if sys.platform.startswith("linux") else "spawn"
+
+_worker = {}
+
+
+# Function to set how many threads a model (or a pipeline's steps) predicts
+# with, so parallel workers don't each start a thread per core
+def set_n_jobs(model, n_jobs):
+    for step in getattr(model, "steps", None) or [(None, model)]:
+        estimator = step[1]
+        if hasattr(estimator, "n_jobs"):
+            estimator.n_jobs = n_jobs
+    return model
+
+
+def _init_worker(sector, model_dir, backend, mmap_mode, all_started):
+    from model_registry import ModelRegistry
+
+    registry = ModelRegistry(model_dir, backend, mmap_mode)
+    set_n_jobs(registry.get(sector)[0], 1)
+    registry.add_reload_listener(lambda sector: set_n_jobs(registry.get(sector)[0], 1))
+    _worker.update(sector=sector, schema=SCHEMAS[sector], registry=registry, all_started=all_started)
+
+
+# Blocks until every worker runs it, so one call lands on each worker
+def _wait_for_all_workers():
+    _worker["all_started"].wait()
+
+
+# Picks up new model artifacts between chunks, like the app's registry watcher
+def _score_chunk(chunk):
+    registry = _worker["registry"]
+    registry.check_for_update(_worker["sector"])
+    model, scaler, version = registry.get_versioned(_worker["sector"])
+    return predict_proba_batch(model, scaler, _worker["schema"].encode_frame(chunk)), version
+
+
+# Scores batches for one sector across a pool of worker processes. Each
+# worker loads the sector's model once (memory-mapped with
+# RETENTIONAI_MMAP_MODE or the compiled backend) and scores single-threaded;
+# results come back in input order whatever order the workers finish in.
+class ScoringPool:
+    def __init__(self, sector, workers=None, model_dir=MODEL_DIR, backend=INFERENCE_BACKEND, mmap_mode=MMAP_MODE):
+        self.sector = sector
+        self.schema = SCHEMAS[sector]
+        self.workers = workers or os.cpu_count() or 1
+        context = multiprocessing.get_context(START_METHOD)
+        self._executor = ProcessPoolExecutor(
+            self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(sector, model_dir, backend, mmap_mode, context.Barrier(self.workers)),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown()
+
+    # Function to start every worker and wait until each has loaded its model.
+    # Workers otherwise start on their first chunk, which puts model loading
+    # in the scoring time.
+    def wait_until_loaded(self):
+        for future in [self._executor.submit(_wait_for_all_workers) for _ in range(self.workers)]:
+            future.result()
+
+    # Function to score an iterable of frames (or dicts of column arrays),
+    # yielding (chunk, probabilities) pairs in input order. Only the schema's
+    # columns are sent to the workers. The model versions that scored the
+    # chunks are added to model_versions when a set is given.
+    def score_chunks(self, chunks, model_versions=None):
+        pending = deque()
+        max_pending = self.workers * CHUNKS_IN_FLIGHT_PER_WORKER
+        for chunk in chunks:
+            self.schema.check_columns(chunk)
+            columns = {column: chunk[column] for column in self.schema.required_columns}
+            pending.append((chunk, time.perf_counter(), self._executor.submit(_score_chunk, columns)))
+            if len(pending) >= max_pending:
+                yield self._result(*pending.popleft(), model_versions)
+        while pending:
+            yield self._result(*pending.popleft(), model_versions)
+
+    # Function to get churn probabilities for a frame, scored in chunks
+    def predict_proba(self, df, chunk_size):
+        import numpy as np
+
+        chunks = (df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size))
+        return np.concatenate([probabilities for _, probabilities in self.score_chunks(chunks)] or [np.empty(0)])
+
+    def _result(self, chunk, submitted_at, future, model_versions):
+        try:
+            probabilities, version = future.result()
+        except Exception:
+            n_rows = len(chunk[self.schema.required_columns[0]])
+            PREDICTIONS_TOTAL.inc(n_rows, sector=self.sector, source="parallel", outcome="error")
+            raise
+        PREDICTION_SECONDS.observe(time.perf_counter() - submitted_at, sector=self.sector, source="parallel", outcome="ok")
+        PREDICTIONS_TOTAL.inc(len(probabilities), sector=self.sector, source="parallel", outcome="ok")
+        if model_versions is not None:
+            model_versions.add(version)
+        return chunk, probabilities
@@ -0,0 +1,129 @@
+import argparse
+import os
+
+import joblib
+import numpy as np
+from sklearn.pipeline import Pipeline
+
+from model_registry import MODEL_DIR, SECTOR_ARTIFACTS
+
+# Synthetic rows of each kind used to check a converted artifact against the
+# originals
+VALIDATION_ROWS = 5000
+
+
+# Function to get the individual decision trees of a model, empty when it
+# isn't tree-based
+def _trees(model):
+    if hasattr(model, "tree_"):
+        return [model]
+    if hasattr(model, "estimators_"):
+        return [tree for tree in np.ravel(model.estimators_) if hasattr(tree, "tree_")]
+    return []
+
+
+# Function to get the mean and scale a StandardScaler applies, as arrays
+def _scaler_statistics(scaler):
+    n_features = scaler.n_features_in_
+    mean = scaler.mean_ if getattr(scaler, "with_mean", True) and scaler.mean_ is not None else np.zeros(n_features)
+    scale = scaler.scale_ if getattr(scaler, "with_std", True) and scaler.scale_ is not None else np.ones(n_features)
+    return np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+
+
+# Function to combine a sector's model and scaler into one Pipeline artifact
+def build_pipeline(model, scaler):
+    return Pipeline([("scaler", scaler), ("model", model)])
+
+
+# Function to draw synthetic encoded customers around the scaler's statistics,
+# plus as many with whole-number values
+def synthetic_features(scaler, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    mean, scale = _scaler_statistics(scaler)
+    continuous = rng.normal(mean, scale, size=(n_rows, len(mean)))
+    whole = rng.integers(np.floor(mean - 3 * scale), np.ceil(mean + 3 * scale) + 1, size=(n_rows, len(mean)))
+    return np.concatenate([continuous, whole.astype(np.float64)])
+
+
+# Function to draw encoded customers that land on a tree model's splits. For
+# every split, its threshold in unscaled units, the float32 values up to two
+# steps either side of it, and the nearest whole numbers and cent amounts each
+# appear in some row, in that split's column. The other values are whole
+# numbers around the scaler's statistics.
+def split_features(model, scaler, seed=0):
+    rng = np.random.default_rng(seed)
+    mean, scale = _scaler_statistics(scaler)
+    trees = _trees(model)
+    if not trees:
+        return np.empty((0, len(mean)))
+
+    features, values = [], []
+    for tree in trees:
+        nodes = tree.tree_
+        splits = nodes.children_left != -1
+        features.append(nodes.feature[splits])
+        values.append(nodes.threshold[splits] * scale[nodes.feature[splits]] + mean[nodes.feature[splits]])
+    features, values = np.concatenate(features), np.concatenate(values)
+    below = above = values.astype(np.float32)
+    candidates = [values, below.astype(np.float64)]
+    for _ in range(2):
+        below, above = np.nextafter(below, np.float32(-np.inf)), np.nextafter(above, np.float32(np.inf))
+        candidates += [below.astype(np.float64), above.astype(np.float64)]
+    candidates += [np.round(values) + step for step in (-1, 0, 1)]
+    candidates += [np.round(values, 2) + step for step in (-0.01, 0, 0.01)]
+    features, candidates = np.tile(features, len(candidates)), np.concatenate(candidates)
+
+    per_feature = [np.unique(candidates[features == feature]) for feature in range(len(mean))]
+    n_rows = max(len(feature_values) for feature_values in per_feature)
+    rows = rng.integers(np.floor(mean - 3 * scale), np.ceil(mean + 3 * scale) + 1, size=(n_rows, len(mean)))
+    rows = rows.astype(np.float64)
+    for feature, feature_values in enumerate(per_feature):
+        rows[rng.permutation(n_rows)[:len(feature_values)], feature] = feature_values
+    return rows
+
+
+# Function to convert a sector's model and scaler pickles into a pipeline
+# artifact. The artifact is only written if it gives exactly the original
+# probabilities for synthetic customers and customers on every split
+# threshold; otherwise ValueError is raised. Returns the path and the number
+# of customers checked.
+def convert_sector(sector, model_dir=MODEL_DIR):
+    files = SECTOR_ARTIFACTS[sector]
+    model = joblib.load(os.path.join(model_dir, files["model"]))
+    scaler = joblib.load(os.path.join(model_dir, files["scaler"]))
+    pipeline = build_pipeline(model, scaler)
+
+    features = np.concatenate([synthetic_features(scaler, VALIDATION_ROWS), split_features(model, scaler)])
+    expected = model.predict_proba(scaler.transform(features))
+    actual = pipeline.predict_proba(features)
+    if not np.array_equal(expected, actual):
+        changed = int((expected != actual).any(axis=1).sum())
+        flipped = int((expected.argmax(axis=1) != actual.argmax(axis=1)).sum())
+        raise ValueError(
+            f"{sector} pipeline differs from the original scaler and model for {changed} of {len(features)} "
+            f"customers (max probability difference {np.abs(expected - actual).max():.2e}, "
+            f"{flipped} labels flipped); not written"
+        )
+
+    path = os.path.join(model_dir, files["pipeline"])
+    joblib.dump(pipeline, path)
+    return path, len(features)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Combine each sector's scaler and model into a single pipeline artifact")
+    parser.add_argument("--sector", choices=sorted(SECTOR_ARTIFACTS), action="append",
+                        help="Sector to convert (repeatable, default: all)")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    args = parser.parse_args()
+
+    for sector in args.sector or sorted(SECTOR_ARTIFACTS):
+        try:
+            path, n_checked = convert_sector(sector, args.model_dir)
+        except ValueError as e:
+            parser.exit(1, f"Error: {e}\n")
+        print(f"{sector}: wrote {path} (identical probabilities for {n_checked:,} check customers)")
+
+
+if __name__ == "__main__":
+    main()
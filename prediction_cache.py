@@ -0,0 +1,93 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from model_registry import get_registry
+
+# Most results kept (0 disables the cache) and how long each stays valid
+DEFAULT_MAX_ENTRIES = int(os.environ.get("RETENTIONAI_CACHE_SIZE", "10000"))
+DEFAULT_TTL_SECONDS = float(os.environ.get("RETENTIONAI_CACHE_TTL_SECONDS", "3600"))
+
+
+# LRU cache of prediction results with a time-to-live. Keys combine the
+# sector, the model version and a hash of the encoded feature vector, so a
+# reloaded model never serves results computed by the previous one.
+class PredictionCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(sector, version, features):
+        digest = hashlib.blake2b(np.ascontiguousarray(features, dtype=float).tobytes(), digest_size=16).digest()
+        return sector, version, digest
+
+    # Function to get a cached result, or None on a miss
+    def get(self, key):
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # Function to drop cached results for one sector, or all of them
+    def invalidate(self, sector=None):
+        with self._lock:
+            if sector is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == sector]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+# Function to get the process-wide prediction cache, which is cleared for a
+# sector whenever the shared registry reloads that sector's model
+def get_prediction_cache():
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                cache = PredictionCache()
+                get_registry().add_reload_listener(cache.invalidate)
+                _default_cache = cache
+    return _default_cache
@@ -0,0 +1,355 @@
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+
+import numpy as np
+
+from features import SCHEMAS
+from metrics import PREDICTION_SECONDS, PREDICTIONS_TOTAL, record_stages
+
+# Rows scored per scaler/model call in batch mode
+DEFAULT_CHUNK_SIZE = 50000
+
+
+# Probability at or above which a customer is labelled "Churned", per sector
+CHURN_THRESHOLDS = {
+    "bank": float(os.environ.get("RETENTIONAI_BANK_THRESHOLD", "0.5")),
+    "telecom": float(os.environ.get("RETENTIONAI_TELECOM_THRESHOLD", "0.5")),
+}
+
+# Risk bands as (lowest churn probability, band name), lowest first
+RISK_BANDS = [(0.0, "Low"), (0.3, "Medium"), (0.6, "High")]
+
+# Columns added by an explainer
+FACTOR_COLUMNS = ["top_risk_factors", "top_retention_factors"]
+
+
+# Function to get the churn probability for a 2D array of encoded customers.
+# scaler may be None when the model is a pipeline that scales its own input.
+def predict_proba_batch(model, scaler, features, timings=None):
+    if len(features) == 0:
+        return np.empty(0)
+    start = time.perf_counter()
+    scaled_features = scaler.transform(features) if scaler is not None else features
+    scaled_at = time.perf_counter()
+    probabilities = model.predict_proba(scaled_features)[:, list(model.classes_).index(1)]
+    if timings is not None:
+        timings["scaling"] = scaled_at - start
+        timings["inference"] = time.perf_counter() - scaled_at
+    return probabilities
+
+
+# Function to turn churn probabilities into "Churned"/"Not Churned" labels.
+# Unscored (NaN) probabilities get an empty label.
+def label_predictions(probabilities, threshold=0.5):
+    probabilities = np.asarray(probabilities, dtype=float)
+    labels = np.where(probabilities >= threshold, "Churned", "Not Churned")
+    return np.where(np.isnan(probabilities), "", labels)
+
+
+# Function to map churn probabilities to risk band names, empty for NaN
+def risk_bands(probabilities):
+    probabilities = np.asarray(probabilities, dtype=float)
+    edges = [edge for edge, _ in RISK_BANDS[1:]]
+    names = np.array([name for _, name in RISK_BANDS])
+    return np.where(np.isnan(probabilities), "", names[np.searchsorted(edges, probabilities, side="right")])
+
+
+# Function to rank churn probabilities into deciles, 10 being the riskiest
+def risk_deciles(probabilities):
+    import pandas as pd
+
+    ranks = pd.Series(probabilities).rank(method="first", pct=True).to_numpy()
+    return np.ceil(ranks * 10).astype(int)
+
+
+# Function to build the result for one customer from its churn probability,
+# and the version of the model that produced it when known
+def churn_result(probability, threshold=0.5, model_version=None):
+    result = {
+        "prediction": "Churned" if probability >= threshold else "Not Churned",
+        "churn_probability": float(probability),
+        "risk_band": str(risk_bands(np.array([probability]))[0]),
+    }
+    if model_version is not None:
+        result["model_version"] = model_version
+    return result
+
+
+# Function to encode and score a frame or list of records, recording stage
+# timings and the number of customers scored
+def _score_batch(model, scaler, schema, frame=None, records=None):
+    timings = {}
+    try:
+        start = time.perf_counter()
+        features = schema.encode_frame(frame) if records is None else schema.encode_records(records)
+        timings["encoding"] = time.perf_counter() - start
+        probabilities = predict_proba_batch(model, scaler, features, timings)
+    except Exception:
+        n_rows = len(records) if records is not None else _n_rows(frame)
+        PREDICTIONS_TOTAL.inc(n_rows, sector=schema.sector, source="batch", outcome="error")
+        raise
+    record_stages(schema.sector, timings)
+    PREDICTIONS_TOTAL.inc(len(probabilities), sector=schema.sector, source="batch", outcome="ok")
+    return probabilities
+
+
+# Function to count the rows of a frame or dict of column arrays
+def _n_rows(data):
+    if isinstance(data, dict):
+        return len(next(iter(data.values()), ()))
+    return len(data)
+
+
+# Function to score a list of customer records (dicts) in one scaler/model
+# call. Each result includes model_version when it is given.
+def predict_records(model, scaler, sector, records, model_version=None):
+    if not records:
+        return []
+    with PREDICTION_SECONDS.time(sector=sector, source="batch"):
+        probabilities = _score_batch(model, scaler, SCHEMAS[sector], records=records)
+    labels = label_predictions(probabilities, CHURN_THRESHOLDS[sector])
+    bands = risk_bands(probabilities)
+    results = [
+        {"prediction": label, "churn_probability": float(probability), "risk_band": band}
+        for label, probability, band in zip(labels.tolist(), probabilities.tolist(), bands.tolist())
+    ]
+    if model_version is not None:
+        for result in results:
+            result["model_version"] = model_version
+    return results
+
+
+# Function to score a frame in chunks, returning a copy with probability,
+# prediction, risk band and risk decile columns. With a
+# parallel_scoring.ScoringPool for the sector, chunks are scored by its worker
+# processes and model and scaler are not used. With an
+# explanations.PathExplainer, top_risk_factors and top_retention_factors
+# columns are added too.
+def score_frame(model, scaler, schema, df, chunk_size=DEFAULT_CHUNK_SIZE, pool=None, explainer=None):
+    schema.check_columns(df)
+
+    if pool is not None:
+        probabilities = pool.predict_proba(df, chunk_size)
+    else:
+        probabilities = np.empty(len(df))
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            with PREDICTION_SECONDS.time(sector=schema.sector, source="batch"):
+                probabilities[start:start + len(chunk)] = _score_batch(model, scaler, schema, frame=chunk)
+
+    scored = _with_scores(df, probabilities, schema.sector, explainer)
+    scored["risk_decile"] = risk_deciles(probabilities)
+    return scored
+
+
+# Function to add probability, prediction and risk band columns to a copy of a
+# frame, and the scored customers' top factors when an explainer is given.
+# A validation_errors column is moved to the end.
+def _with_scores(df, probabilities, sector, explainer=None):
+    scored = df.copy()
+    errors = scored.pop("validation_errors") if "validation_errors" in scored else None
+    scored["churn_probability"] = probabilities
+    scored["churn_prediction"] = label_predictions(probabilities, CHURN_THRESHOLDS[sector])
+    scored["risk_band"] = risk_bands(probabilities)
+    if explainer is not None:
+        for column, values in _explain_scored(explainer, df, probabilities).items():
+            scored[column] = values
+    if errors is not None:
+        scored["validation_errors"] = errors
+    return scored
+
+
+# Function to explain the scored rows of a frame (or dict of column arrays),
+# leaving unscored (NaN) rows' factors empty
+def _explain_scored(explainer, data, probabilities):
+    scored = ~np.isnan(probabilities)
+    if scored.all():
+        return explainer.explain_frame(data)
+    from incremental import take_rows
+
+    factors = {column: np.full(len(scored), "", dtype=object) for column in FACTOR_COLUMNS}
+    # A chunk with no valid rows has nothing to explain
+    if scored.any():
+        for column, values in explainer.explain_frame(take_rows(data, scored)).items():
+            factors[column][scored] = values
+    return factors
+
+
+# Function to score an iterable of frames (or dicts of column arrays) in input
+# order, yielding (chunk, probabilities) pairs. Chunks are scored in-process or
+# by pool, and through incremental (an incremental.FingerprintStore) when given,
+# so only changed customers reach the model. With validate, rows breaking the
+# sector's validation rules aren't scored: their probability is NaN and the
+# chunk gets a validation_errors column saying why.
+def _scored_chunks(model, scaler, schema, chunks, pool=None, model_versions=None, incremental=None, validate=False):
+    def score(chunks):
+        if pool is not None:
+            return pool.score_chunks(chunks, model_versions)
+        return ((chunk, _score_batch(model, scaler, schema, frame=chunk)) for chunk in chunks)
+
+    def score_changed(chunks):
+        return score(chunks) if incremental is None else incremental.score_chunks(chunks, score)
+
+    if not validate:
+        return score_changed(chunks)
+    from validation import score_valid_rows
+
+    return score_valid_rows(schema.sector, chunks, score_changed)
+
+
+# Function to score a CSV file (path or binary file) chunk by chunk, writing
+# each scored chunk to output (path or text file) as soon as it is ready, so
+# memory use depends on chunk_size and not on the size of the file. Streamed
+# output has no risk_decile column, which needs every probability at once.
+# progress is called after each chunk with the rows scored so far and the
+# fraction of the input read (None if its size is unknown). Returns the row,
+# churned and high-risk counts and the top_n riskiest customers, plus the
+# model versions the workers used when scored with a pool. pool works as in
+# score_frame. With incremental, only customers that changed since the store's
+# last run are scored and the rest keep their stored probabilities. explainer
+# adds factor columns as in score_frame. With validate, customers breaking the
+# sector's validation rules (see validation.py) are not scored; they keep
+# empty scores and a validation_errors column says why, and the summary counts
+# them as rejected.
+def stream_score_csv(model, scaler, schema, csv_file, output, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, top_n=100,
+                     pool=None, incremental=None, explainer=None, validate=True):
+    import pandas as pd
+
+    summary = {"rows": 0, "churned": 0, "high_risk": 0, "rejected": 0, "top": None}
+    source = open(csv_file, "rb") if isinstance(csv_file, (str, os.PathLike)) else nullcontext(csv_file)
+    sink = open(output, "w", newline="") if isinstance(output, (str, os.PathLike)) else nullcontext(output)
+    with source as reader_file, sink as out:
+        total_bytes = _input_size(reader_file)
+        chunks = pd.read_csv(reader_file, chunksize=chunk_size)
+        if pool is not None:
+            summary["model_versions"] = set()
+        scored_chunks = _scored_chunks(
+            model, scaler, schema, chunks, pool, summary.get("model_versions"), incremental, validate,
+        )
+        for chunk, probabilities in scored_chunks:
+            scored = _with_scores(chunk, probabilities, schema.sector, explainer)
+            scored.to_csv(out, header=summary["rows"] == 0, index=False)
+
+            summary["rows"] += len(scored)
+            summary["churned"] += int((scored["churn_prediction"] == "Churned").sum())
+            summary["high_risk"] += int((scored["risk_band"] == "High").sum())
+            summary["rejected"] += int(np.isnan(probabilities).sum())
+            top = scored.nlargest(top_n, "churn_probability")
+            if summary["top"] is not None:
+                top = pd.concat([summary["top"], top]).nlargest(top_n, "churn_probability")
+            summary["top"] = top
+
+            if progress is not None:
+                fraction = reader_file.tell() / total_bytes if total_bytes else None
+                progress(summary["rows"], fraction)
+    return summary
+
+
+# Function to get the size of a seekable file from its current position, or
+# None when it can't be seeked
+def _input_size(file):
+    try:
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END) - position
+        file.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+# Function to score a Parquet file (path or binary file) one record batch at a
+# time and write the results to a Parquet output (path or binary file) as it
+# goes. Only the columns the schema needs and keep_columns are read, so wide
+# tables cost no more I/O than narrow ones; keep_columns=None keeps every
+# column. Numeric columns reach the encoder without a copy where Arrow's
+# layout allows. The output has the columns read plus churn_probability,
+# churn_prediction and risk_band (and the factor and validation_errors columns
+# with an explainer and validate); rejected rows' scores are null. progress,
+# top_n, pool, incremental, explainer, validate and the returned summary work
+# as in stream_score_csv.
+def stream_score_parquet(model, scaler, schema, source, output, batch_size=DEFAULT_CHUNK_SIZE, progress=None, top_n=100,
+                         pool=None, keep_columns=(), incremental=None, explainer=None, validate=True):
+    import pandas as pd
+
+    pa, pq = _import_pyarrow()
+    parquet_file = pq.ParquetFile(source)
+    input_schema = parquet_file.schema_arrow
+    score_columns = schema.required_columns + ([incremental.id_column] if incremental is not None else [])
+    missing = [column for column in score_columns if column not in input_schema.names]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    if keep_columns is None:
+        columns = list(input_schema.names)
+    else:
+        unknown = [column for column in keep_columns if column not in input_schema.names]
+        if unknown:
+            raise ValueError(f"Columns not in the file: {', '.join(unknown)}")
+        columns = list(dict.fromkeys(list(keep_columns) + score_columns))
+
+    factor_columns = FACTOR_COLUMNS if explainer is not None else []
+    output_schema = pa.schema(
+        [input_schema.field(column) for column in columns]
+        + [pa.field("churn_probability", pa.float64()), pa.field("churn_prediction", pa.string()),
+           pa.field("risk_band", pa.string())]
+        + [pa.field(column, pa.string()) for column in factor_columns]
+        + ([pa.field("validation_errors", pa.string())] if validate else [])
+    )
+
+    # Batches wait here while their columns are scored; results come back in order
+    pending = deque()
+
+    def encoder_columns(batches):
+        for batch in batches:
+            pending.append(batch)
+            yield {column: batch.column(column).to_numpy(zero_copy_only=False) for column in score_columns}
+
+    summary = {"rows": 0, "churned": 0, "high_risk": 0, "rejected": 0, "top": None}
+    batches = encoder_columns(parquet_file.iter_batches(batch_size=batch_size, columns=columns))
+    if pool is not None:
+        summary["model_versions"] = set()
+    scored_batches = _scored_chunks(
+        model, scaler, schema, batches, pool, summary.get("model_versions"), incremental, validate,
+    )
+
+    total_rows = parquet_file.metadata.num_rows
+    with pq.ParquetWriter(output, output_schema) as writer:
+        for data, probabilities in scored_batches:
+            batch = pending.popleft()
+            rejected = np.isnan(probabilities)
+            labels = label_predictions(probabilities, CHURN_THRESHOLDS[schema.sector])
+            bands = risk_bands(probabilities)
+            factors = _explain_scored(explainer, data, probabilities) if explainer is not None else {}
+            table = pa.Table.from_arrays(
+                [batch.column(column) for column in columns]
+                + [pa.array(values, mask=rejected) for values in (probabilities, labels, bands)]
+                + [pa.array(factors[column], pa.string(), mask=rejected) for column in factor_columns]
+                + ([pa.array(data["validation_errors"], pa.string())] if validate else []),
+                schema=output_schema,
+            )
+            writer.write_table(table)
+
+            summary["rows"] += len(probabilities)
+            summary["churned"] += int((labels == "Churned").sum())
+            summary["high_risk"] += int((bands == "High").sum())
+            summary["rejected"] += int(rejected.sum())
+            riskiest = np.argsort(-probabilities, kind="stable")[:top_n]
+            riskiest = riskiest[~rejected[riskiest]]
+            top = table.take(pa.array(riskiest)).to_pandas()
+            if summary["top"] is not None:
+                top = pd.concat([summary["top"], top], ignore_index=True).nlargest(top_n, "churn_probability")
+            summary["top"] = top
+
+            if progress is not None:
+                progress(summary["rows"], summary["rows"] / total_rows if total_rows else None)
+    return summary
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet scoring needs pyarrow: pip install pyarrow") from e
+    return pa, pq
@@ -0,0 +1,164 @@
+from collections import deque
+
+import numpy as np
+
+from features import CARD_TYPES, CONTRACTS, GENDERS, INTERNET_SERVICES, PAYMENT_METHODS, SCHEMAS
+from incremental import take_rows
+
+# Values accepted for yes/no inputs
+FLAGS = [0, 1]
+
+# Validation rules for each sector's input columns. Numeric columns have an
+# inclusive "min" and/or "max", or an exclusive "above" for columns where 0
+# means the value wasn't filled in; other columns list their "allowed" values.
+# The form takes its input limits from the same rules.
+VALIDATION_RULES = {
+    "bank": {
+        "credit_score": {"min": 300, "max": 900},
+        "age": {"min": 18, "max": 100},
+        "tenure": {"min": 0, "max": 10},
+        "balance": {"min": 0.0},
+        "num_of_products": {"min": 1, "max": 4},
+        "has_cr_card": {"allowed": FLAGS},
+        "is_active_member": {"allowed": FLAGS},
+        "estimated_salary": {"above": 0.0},
+        "satisfaction_score": {"min": 1, "max": 5},
+        "points_earned": {"above": 0},
+        "gender": {"allowed": GENDERS},
+        "card_type": {"allowed": CARD_TYPES},
+    },
+    "telecom": {
+        "senior_citizen": {"allowed": FLAGS},
+        "partner": {"allowed": FLAGS},
+        "dependent": {"allowed": FLAGS},
+        "tenure": {"above": 0, "max": 100},
+        "phone_service": {"allowed": FLAGS},
+        "multiple_lines": {"allowed": FLAGS},
+        "online_security": {"allowed": FLAGS},
+        "online_backup": {"allowed": FLAGS},
+        "device_protection": {"allowed": FLAGS},
+        "tech_support": {"allowed": FLAGS},
+        "streaming_tv": {"allowed": FLAGS},
+        "streaming_movie": {"allowed": FLAGS},
+        "paperless_billing": {"allowed": FLAGS},
+        "monthly_charges": {"above": 0.0},
+        "total_charges": {"above": 0.0},
+        "gender": {"allowed": GENDERS},
+        "internet_service": {"allowed": INTERNET_SERVICES},
+        "contract": {"allowed": CONTRACTS},
+        "payment_method": {"allowed": PAYMENT_METHODS},
+    },
+}
+
+
+# Function to get the st.number_input limits (min_value/max_value) for a
+# column from its rule
+def input_limits(sector, column):
+    rule = VALIDATION_RULES[sector][column]
+    limits = {}
+    if "min" in rule or "above" in rule:
+        limits["min_value"] = rule.get("min", rule.get("above"))
+    if "max" in rule:
+        limits["max_value"] = rule["max"]
+    return limits
+
+
+# Function to describe what a rule accepts
+def rule_message(column, rule):
+    if "allowed" in rule:
+        return f"{column} must be one of {', '.join(str(value) for value in rule['allowed'])}"
+    if "min" in rule and "max" in rule:
+        return f"{column} must be between {rule['min']} and {rule['max']}"
+    bounds = []
+    if "above" in rule:
+        bounds.append(f"above {rule['above']}")
+    if "min" in rule:
+        bounds.append(f"at least {rule['min']}")
+    if "max" in rule:
+        bounds.append(f"at most {rule['max']}")
+    return f"{column} must be {' and '.join(bounds)}"
+
+
+# Function to get a column's values as floats, with anything that isn't a
+# number as NaN
+def _as_numbers(values):
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        import pandas as pd
+
+        return pd.to_numeric(pd.Series(np.asarray(values, dtype=object)), errors="coerce").to_numpy(dtype=float)
+
+
+# Function to check each rule against a whole frame (or dict of column arrays)
+# at once, yielding (message, failed) pairs where failed is a boolean mask of
+# the rows breaking the rule
+def check_rules(sector, data):
+    for column, rule in VALIDATION_RULES[sector].items():
+        values = data[column]
+        allowed = rule.get("allowed")
+        if allowed is not None and isinstance(allowed[0], str):
+            failed = ~np.isin(np.asarray(values, dtype=object).astype(str), allowed)
+        else:
+            numbers = _as_numbers(values)
+            missing = ~np.isfinite(numbers)
+            if missing.any():
+                yield f"{column} is missing or not a finite number", missing
+            if allowed is not None:
+                failed = ~missing & ~np.isin(numbers, allowed)
+            else:
+                failed = ~missing & (
+                    (numbers < rule.get("min", -np.inf)) | (numbers > rule.get("max", np.inf))
+                    | (numbers <= rule.get("above", -np.inf))
+                )
+        if failed.any():
+            yield rule_message(column, rule), failed
+
+
+# Function to validate a frame (or dict of column arrays) of customers,
+# returning each row's problems as "; "-separated text, empty for valid rows
+def validate_rows(sector, data):
+    SCHEMAS[sector].check_columns(data)
+    n_rows = len(data[SCHEMAS[sector].required_columns[0]])
+    errors = np.full(n_rows, "", dtype=object)
+    for message, failed in check_rules(sector, data):
+        errors[failed] = np.where(errors[failed] == "", "", errors[failed] + "; ") + message
+    return errors
+
+
+# Function to validate one customer record (dict), returning a list of
+# problems (empty when it is valid)
+def validate_record(sector, record):
+    data = {column: [record.get(column)] for column in SCHEMAS[sector].required_columns}
+    return [message for message, failed in check_rules(sector, data) if failed[0]]
+
+
+# Function to validate a list of customer records (dicts) as one batch,
+# returning each record's problems as "; "-separated text
+def validate_records(sector, records):
+    columns = SCHEMAS[sector].required_columns
+    return validate_rows(sector, {column: [record.get(column) for record in records] for column in columns})
+
+
+# Function to score only the valid rows of each chunk. score works as in
+# incremental.FingerprintStore.score_chunks. Yields each whole chunk with a
+# validation_errors column added, and NaN as the probability of rejected rows.
+def score_valid_rows(sector, chunks, score):
+    pending = deque()
+
+    def valid_rows(chunks):
+        for chunk in chunks:
+            errors = validate_rows(sector, chunk)
+            valid = errors == ""
+            pending.append((chunk, errors, valid))
+            yield take_rows(chunk, valid)
+
+    for _, valid_probabilities in score(valid_rows(chunks)):
+        chunk, errors, valid = pending.popleft()
+        probabilities = np.full(len(valid), np.nan)
+        probabilities[valid] = valid_probabilities
+        if isinstance(chunk, dict):
+            chunk = dict(chunk, validation_errors=errors)
+        else:
+            chunk = chunk.assign(validation_errors=errors)
+        yield chunk, probabilities